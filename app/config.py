@@ -0,0 +1,9 @@
+import os
+
+
+def env_flag(name, default=False):
+    """Read a boolean feature flag from the environment ("1", "true", "yes", "on")."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
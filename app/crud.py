@@ -1,9 +1,21 @@
+from sqlalchemy import and_, case, false, func, insert, literal, or_, select, text, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, OperationalError
-from datetime import datetime
+from datetime import datetime, date, timedelta
 import hashlib
+import uuid
+from collections import Counter
 
-from .models import Hackathon
+from .database import WriteSession
+from .models import Hackathon, HackathonStaging, HackathonStat, ImageAsset, HackathonChange
+from .stats import apply_stat_deltas, row_stat_keys, stat_keys
+from .profiling import span
+from scrapers.resilience import CircuitBreaker, retry_call
+
+# Shared by every DB write: stops hammering a database that is clearly down
+db_breaker = CircuitBreaker("database", failure_threshold=5, reset_timeout=30)
+# pg_advisory_xact_lock key serializing writers of hackathons (any app-unique int)
+CHANGE_LOG_LOCK_KEY = 31031
 
 
 # ---------- HELPERS ---------- #
@@ -11,6 +23,8 @@ from .models import Hackathon
 def safe_date(value):
     if not value:
         return None
+    if isinstance(value, date):
+        return value
     try:
         return datetime.strptime(value, "%Y-%m-%d").date()
     except Exception:
@@ -33,9 +47,226 @@ def generate_external_id(h):
     return f"{h.get('platform')}::" + hashlib.sha256(raw.encode()).hexdigest()
 
 
+def lock_hackathon_writes(db: Session):
+    """
+    Serialize writers of hackathons / change log / stats until this
+    transaction ends, so what they read before writing can't go stale.
+    Postgres: transaction-scoped advisory lock. SQLite: a no-op UPDATE, which
+    takes the database write lock for the rest of the transaction.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGE_LOG_LOCK_KEY})
+    else:
+        db.execute(update(HackathonStat).where(false()).values(count=HackathonStat.count))
+
+
+def record_changes(db: Session, op, external_ids):
+    """
+    Append change-log entries; committed together with the data change.
+
+    Postgres hands out versions at INSERT time, so two overlapping writers
+    could commit them out of order and a client already past the higher
+    version would never see the lower one. The transaction-scoped advisory
+    lock makes change-log writers take versions and commit one at a time.
+    """
+    if external_ids:
+        lock_hackathon_writes(db)
+        now = datetime.utcnow()
+        db.add_all(
+            HackathonChange(external_id=eid, op=op, changed_at=now)
+            for eid in external_ids
+        )
+
+
+def with_db_retry(work, attempts=3):
+    """
+    Run work(db) in a fresh session, retrying with backoff when the
+    connection drops (e.g. SSL resets on long-idle Postgres connections).
+    """
+    def attempt():
+        db = WriteSession()
+        try:
+            return work(db)
+        finally:
+            db.close()
+
+    return retry_call(
+        attempt,
+        attempts=attempts,
+        base_delay=1.0,
+        max_delay=10.0,
+        retry_on=(OperationalError,),
+        breaker=db_breaker,
+    )
+
+
 # ---------- CORE LOGIC ---------- #
 
+# Columns a re-scrape may overwrite; empty scraped values never erase stored ones
+UPDATABLE_FIELDS = ["prize", "participants", "location", "start_date", "end_date", "image_url"]
+INSERT_FIELDS = ["external_id", "name", "platform", "link", *UPDATABLE_FIELDS]
+# Staged batches left behind by a crashed process are purged after this long
+STAGING_MAX_AGE = timedelta(days=1)
+
+
+def _staged_present(field):
+    """SQL version of the `if new_val` check: a non-empty scraped value."""
+    column = getattr(HackathonStaging, field)
+    if field in ("start_date", "end_date"):
+        return column.isnot(None)
+    return and_(column.isnot(None), column != "")
+
+
+def _field_changed(field):
+    return and_(
+        _staged_present(field),
+        getattr(Hackathon, field).is_distinct_from(getattr(HackathonStaging, field)),
+    )
+
+
+def stage_hackathons(db: Session, hackathons: dict):
+    """
+    Bulk-load a scrape ({external_id: hackathon}) into hackathon_staging in
+    its own transaction; the live table is untouched. Returns the batch_id.
+    """
+    batch_id = uuid.uuid4().hex
+    rows = [
+        {
+            "batch_id": batch_id,
+            "external_id": external_id,
+            "name": h.get("name", "Unknown"),
+            "platform": h.get("platform", "Unknown"),
+            "link": h.get("link"),
+            "start_date": safe_date(h.get("start_date")),
+            "end_date": safe_date(h.get("end_date")),
+            "location": h.get("location"),
+            "prize": h.get("prize"),
+            "participants": h.get("participants"),
+            "image_url": h.get("image_url"),
+        }
+        for external_id, h in hackathons.items()
+    ]
+    if rows:
+        db.execute(insert(HackathonStaging), rows)
+    db.commit()
+    return batch_id
+
+
+def discard_staged(db: Session, batch_id=None):
+    """Drop one staged batch, or (batch_id=None) every batch older than STAGING_MAX_AGE."""
+    query = db.query(HackathonStaging)
+    if batch_id:
+        query = query.filter(HackathonStaging.batch_id == batch_id)
+    else:
+        query = query.filter(HackathonStaging.staged_at < datetime.utcnow() - STAGING_MAX_AGE)
+    count = query.delete(synchronize_session=False)
+    db.commit()
+    return count
+
+
+def publish_staged(db: Session, batch_id):
+    """
+    Diff a staged batch against the live table in SQL and apply it - inserts,
+    updates, change log and /stats deltas - in one short transaction, so
+    readers see either none or all of a scrape.
+    """
+    S, H = HackathonStaging, Hackathon
+    in_batch = S.batch_id == batch_id
+    same_hackathon = H.external_id == S.external_id
+    any_changed = or_(*(_field_changed(f) for f in UPDATABLE_FIELDS))
+
+    # Taken before the diff: an overlapping publish must diff against our
+    # result, not the same old state, or both would count the same changes
+    lock_hackathon_writes(db)
+
+    # ---- diff ----
+    with span("diff"):
+        new_rows = (
+            db.query(S.external_id, S.platform, S.location, S.start_date, S.end_date, S.image_url)
+            .outerjoin(H, same_hackathon)
+            .filter(in_batch, H.id.is_(None))
+            .all()
+        )
+        changed_rows = (
+            db.query(
+                H.external_id, H.name, H.platform,
+                *(getattr(H, f) for f in UPDATABLE_FIELDS),
+                *(getattr(S, f) for f in UPDATABLE_FIELDS),
+            )
+            .select_from(S)
+            .join(H, same_hackathon)
+            .filter(in_batch, any_changed)
+            .all()
+        )
+        matched = db.query(func.count(S.id)).join(H, same_hackathon).filter(in_batch).scalar()
+
+    changed_image_urls = {row.image_url for row in new_rows if row.image_url}
+    stat_deltas = Counter()
+    for row in new_rows:
+        stat_deltas.update(stat_keys(row.platform, row.location, row.start_date, row.end_date))
+
+    n = len(UPDATABLE_FIELDS)
+    for row in changed_rows:
+        old = dict(zip(UPDATABLE_FIELDS, row[3:3 + n]))
+        staged = dict(zip(UPDATABLE_FIELDS, row[3 + n:]))
+        new = {f: staged[f] or old[f] for f in UPDATABLE_FIELDS}
+        changed_fields = [f for f in UPDATABLE_FIELDS if new[f] != old[f]]
+        if "image_url" in changed_fields:
+            changed_image_urls.add(new["image_url"])
+        stat_deltas.subtract(stat_keys(row.platform, old["location"], old["start_date"], old["end_date"]))
+        stat_deltas.update(stat_keys(row.platform, new["location"], new["start_date"], new["end_date"]))
+        print(f"🔄 Updated '{row.name}' - fields: {', '.join(changed_fields)}")
+
+    # ---- apply ----
+    with span("apply"):
+        if new_rows:
+            now = datetime.utcnow()
+            db.execute(
+                insert(H).from_select(
+                    INSERT_FIELDS + ["created_at", "updated_at"],
+                    select(*(getattr(S, f) for f in INSERT_FIELDS), literal(now), literal(now))
+                    .select_from(S)
+                    .outerjoin(H, same_hackathon)
+                    .where(in_batch, H.id.is_(None)),
+                )
+            )
+        if changed_rows:
+            db.execute(
+                update(H)
+                .where(same_hackathon, in_batch, any_changed)
+                .values({
+                    f: case((_staged_present(f), getattr(S, f)), else_=getattr(H, f))
+                    for f in UPDATABLE_FIELDS
+                })
+                .execution_options(synchronize_session=False)
+            )
+        record_changes(db, "inserted", [row.external_id for row in new_rows])
+        record_changes(db, "updated", [row.external_id for row in changed_rows])
+        apply_stat_deltas(db, stat_deltas)
+        db.query(S).filter(in_batch).delete(synchronize_session=False)
+
+    try:
+        with span("commit"):
+            db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        print("❌ DB commit failed:", e)
+        raise
+
+    return {
+        "inserted": len(new_rows),
+        "updated": len(changed_rows),
+        "skipped": matched,
+        "changed_image_urls": sorted(changed_image_urls),
+    }
+
+
 def upsert_hackathons(db: Session, hackathons: list):
+    """
+    Stage a scrape, then publish it atomically. The slow part (loading rows)
+    happens in hackathon_staging; the live table is only locked for the
+    set-based diff/apply at the end.
+    """
     # Get row count with error handling
     try:
         existing_count = db.query(Hackathon).count()
@@ -51,73 +282,21 @@ def upsert_hackathons(db: Session, hackathons: list):
         eid = generate_external_id(h)
         unique_input[eid] = h  # last one wins
 
-    hackathons = list(unique_input.values())
-
-    inserted = 0
-    updated = 0
-    skipped = 0
-
-    # ✅ USE external_id as the ONLY identity
-    existing = {
-        h.external_id: h
-        for h in db.query(Hackathon).all()
-    }
-
-    for h in hackathons:
-        external_id = generate_external_id(h)
-        existing_row = existing.get(external_id)
-
-        if existing_row:
-            changed_fields = []
-
-            for field in ["prize", "participants", "location", "start_date", "end_date", "image_url"]:
-                new_val = h.get(field)
-                if new_val and getattr(existing_row, field) != new_val:
-                    setattr(existing_row, field, new_val)
-                    changed_fields.append(field)
-
-            if changed_fields:
-                updated += 1
-                print(f"🔄 Updated '{existing_row.name}' - fields: {', '.join(changed_fields)}")
-
-            skipped += 1
-            continue
-
-        # ✅ INSERT NEW
-        hack = Hackathon(
-            external_id=external_id,
-            name=h.get("name", "Unknown"),
-            platform=h.get("platform", "Unknown"),
-            link=h.get("link"),
-            start_date=safe_date(h.get("start_date")),
-            end_date=safe_date(h.get("end_date")),
-            location=h.get("location"),
-            prize=h.get("prize"),
-            participants=h.get("participants"),
-            image_url=h.get("image_url"),
-        )
-
-        db.add(hack)
-        existing[external_id] = hack
-        inserted += 1
-
+    with span("stage"):
+        batch_id = stage_hackathons(db, unique_input)
     try:
-        db.commit()
-    except IntegrityError as e:
+        with span("publish"):
+            result = publish_staged(db, batch_id)
+    except Exception:
         db.rollback()
-        print("❌ DB commit failed:", e)
+        discard_staged(db, batch_id)
         raise
 
-    print(f"✅ Inserted: {inserted}")
-    print(f"🔄 Updated: {updated}")
-    print(f"⚠️ Skipped: {skipped}")
+    print(f"✅ Inserted: {result['inserted']}")
+    print(f"🔄 Updated: {result['updated']}")
+    print(f"⚠️ Skipped: {result['skipped']}")
 
-    return {
-        "inserted": inserted,
-        "updated": updated,
-        "skipped": skipped,
-        "total": len(hackathons),
-    }
+    return {**result, "total": len(unique_input)}
 
 
 def delete_expired_hackathons(db: Session) -> int:
@@ -127,20 +306,95 @@ def delete_expired_hackathons(db: Session) -> int:
     """
     from datetime import date
     now = date.today()
-    
+
+    # Overlapping cleanups must not both count (and log) the same rows
+    lock_hackathon_writes(db)
+
     # Only delete if end_date is set and is before today
     expired = db.query(Hackathon).filter(
         Hackathon.end_date.isnot(None),
         Hackathon.end_date < now
     )
     
-    count = expired.count()
+    expired_rows = expired.with_entities(
+        Hackathon.external_id,
+        Hackathon.platform,
+        Hackathon.location,
+        Hackathon.start_date,
+        Hackathon.end_date,
+    ).all()
+    count = len(expired_rows)
     if count > 0:
+        stat_deltas = Counter()
+        for row in expired_rows:
+            stat_deltas.subtract(row_stat_keys(row))
         expired.delete(synchronize_session=False)
+        record_changes(db, "deleted", [row.external_id for row in expired_rows])
+        apply_stat_deltas(db, stat_deltas)
         db.commit()
         print(f"🧹 Deleted {count} expired hackathons")
     else:
+        db.rollback()  # release the write lock
         print("🧹 No expired hackathons to delete")
     
     return count
 
+
+
+# ---------- READ PATHS ---------- #
+
+def hackathon_rows_query(db: Session, fields, platform=None):
+    """
+    Query selecting only the requested columns. Rows come back as plain
+    tuples instead of ORM entities, which skips identity-map bookkeeping.
+    """
+    columns = [
+        ImageAsset.content_hash if f == "image_hash" else getattr(Hackathon, f)
+        for f in fields
+    ]
+    query = db.query(*columns).select_from(Hackathon)
+    if "image_hash" in fields:
+        query = query.outerjoin(
+            ImageAsset,
+            (ImageAsset.source_url == Hackathon.image_url) & (ImageAsset.status == "ok"),
+        )
+    if platform:
+        query = query.filter(Hackathon.platform == platform)
+    return query.order_by(Hackathon.id)
+
+
+def latest_change_version(db: Session) -> int:
+    return db.query(func.max(HackathonChange.version)).scalar() or 0
+
+
+def changes_since(db: Session, since: int, limit: int, fields):
+    """
+    Change-log entries after `since`, oldest first, each with the current
+    row (None once the hackathon has been deleted).
+    """
+    columns = [getattr(Hackathon, f) for f in fields]
+    rows = (
+        db.query(
+            HackathonChange.version,
+            HackathonChange.external_id,
+            HackathonChange.op,
+            HackathonChange.changed_at,
+            Hackathon.id,
+            *columns,
+        )
+        .outerjoin(Hackathon, Hackathon.external_id == HackathonChange.external_id)
+        .filter(HackathonChange.version > since)
+        .order_by(HackathonChange.version)
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            "version": row[0],
+            "external_id": row[1],
+            "op": row[2],
+            "changed_at": row[3],
+            "hackathon": dict(zip(fields, row[5:])) if row[4] is not None else None,
+        }
+        for row in rows
+    ]
@@ -1,28 +1,144 @@
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional read replica; API reads go here when set
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
 
 if DATABASE_URL is None:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
+# Each workload gets its own pool so a long scrape transaction can't starve
+# API reads. (pool_size, max_overflow) defaults, overridable per workload,
+# e.g. DB_READ_POOL_SIZE=10 DB_WRITE_MAX_OVERFLOW=0
+POOL_DEFAULTS = {
+    "read": (5, 10),        # API requests
+    "write": (2, 2),        # scraper upserts, image refresh
+    "maintenance": (1, 1),  # cleanup jobs, migrations
+}
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait to check out a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # QueuePool._do_get calls itself when overflow is contended; only the
+        # outermost call per thread is one checkout
+        self._depth = threading.local()
+
+    def _do_get(self):
+        depth = getattr(self._depth, "value", 0)
+        if depth:
+            return super()._do_get()
+
+        self._depth.value = 1
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            with self.stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            self._depth.value = 0
+            waited = time.perf_counter() - started
+            with self.stats_lock:
+                self.checkouts += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+    def recreate(self):
+        # Keep counting across pool recreation (e.g. after a disconnect)
+        new_pool = super().recreate()
+        new_pool.checkouts, new_pool.timeouts = self.checkouts, self.timeouts
+        new_pool.total_wait, new_pool.max_wait = self.total_wait, self.max_wait
+        return new_pool
+
+
+def _pool_setting(workload, name, default):
+    return int(os.getenv(f"DB_{workload.upper()}_{name}", str(default)))
+
+
+def _make_engine(url, workload):
+    pool_size, max_overflow = POOL_DEFAULTS[workload]
     # PostgreSQL with connection pooling and SSL support
-    engine = create_engine(
-        DATABASE_URL,
-        pool_size=5,          # Maintain 5 persistent connections
-        max_overflow=10,      # Allow up to 10 additional connections under load
+    return create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=_pool_setting(workload, "POOL_SIZE", pool_size),
+        max_overflow=_pool_setting(workload, "MAX_OVERFLOW", max_overflow),
+        pool_timeout=POOL_TIMEOUT,
         pool_recycle=1800,    # Recycle connections every 30 minutes to avoid timeout
         pool_pre_ping=True,   # Verify connection health before use
         echo=False
     )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+if DATABASE_URL.startswith("sqlite"):
+    # One file, one writer: all workloads share a single engine
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    read_engine = write_engine = maintenance_engine = engine
+else:
+    write_engine = _make_engine(DATABASE_URL, "write")
+    read_engine = _make_engine(DATABASE_READ_URL or DATABASE_URL, "read")
+    maintenance_engine = _make_engine(DATABASE_URL, "maintenance")
+    engine = write_engine
+
+ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+WriteSession = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+MaintenanceSession = sessionmaker(autocommit=False, autoflush=False, bind=maintenance_engine)
+# Backwards-compatible name; writers should say which pool they want
+SessionLocal = WriteSession
 Base = declarative_base()
 
+ENGINES = {
+    "read": read_engine,
+    "write": write_engine,
+    "maintenance": maintenance_engine,
+}
+
+
+def pool_stats():
+    """Per-workload pool usage, for sizing pools from real data."""
+    stats = {}
+    for workload, eng in ENGINES.items():
+        pool = eng.pool
+        entry = {
+            "pool": type(pool).__name__,
+            "replica": workload == "read" and bool(DATABASE_READ_URL) and eng is not write_engine,
+        }
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + pool._max_overflow
+            entry.update(
+                size=pool.size(),
+                max_overflow=pool._max_overflow,
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                saturation=round(pool.checkedout() / capacity, 3) if capacity > 0 else None,
+            )
+        if isinstance(pool, TimedQueuePool):
+            with pool.stats_lock:
+                entry.update(
+                    checkouts=pool.checkouts,
+                    timeouts=pool.timeouts,
+                    avg_wait_ms=round(pool.total_wait / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+                    max_wait_ms=round(pool.max_wait * 1000, 3),
+                )
+        stats[workload] = entry
+    return stats
@@ -0,0 +1,165 @@
+"""
+Thumbnail cache for scraped image_url banners.
+
+Each distinct image URL is downloaded once, resized to a WebP thumbnail and
+written to a content-addressed store keyed by the sha256 of the original
+bytes. The API serves thumbnails from /images/{hash}; since a hash never
+changes content, responses can be cached forever. URLs are only fetched again
+when upsert_hackathons reports them as new or changed; backfill_images()
+covers rows that were stored before the cache existed.
+"""
+import hashlib
+import io
+import os
+import re
+
+from sqlalchemy.orm import Session
+
+from .database import WriteSession
+from .models import Hackathon, ImageAsset
+
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", "./image_store")
+THUMBNAIL_SIZE = (
+    int(os.getenv("THUMBNAIL_WIDTH", "640")),
+    int(os.getenv("THUMBNAIL_HEIGHT", "360")),
+)
+THUMBNAIL_QUALITY = 80
+IMAGE_FETCH_TIMEOUT = float(os.getenv("IMAGE_FETCH_TIMEOUT", "15"))
+# Refuse to download anything bigger than this
+IMAGE_MAX_BYTES = 10 * 1024 * 1024
+
+HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def thumbnail_path(content_hash):
+    return os.path.join(IMAGE_STORE_DIR, content_hash[:2], f"{content_hash}.webp")
+
+
+def make_thumbnail(data):
+    """Resize raw image bytes into WebP thumbnail bytes."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        img.thumbnail(THUMBNAIL_SIZE)
+        out = io.BytesIO()
+        img.save(out, format="WEBP", quality=THUMBNAIL_QUALITY, method=4)
+        return out.getvalue()
+
+
+def store_image(data):
+    """Write a thumbnail for these bytes into the store (once) and return its hash."""
+    content_hash = hashlib.sha256(data).hexdigest()
+    path = thumbnail_path(content_hash)
+    if not os.path.exists(path):
+        thumb = make_thumbnail(data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(thumb)
+        os.replace(tmp_path, path)  # atomic, readers never see half a file
+    return content_hash
+
+
+def _download(client, url):
+    """Download an image, giving up as soon as it is known to exceed IMAGE_MAX_BYTES."""
+    with client.stream("GET", url) as resp:
+        resp.raise_for_status()
+        if not resp.headers.get("content-type", "image/").startswith("image/"):
+            raise ValueError(f"not an image: {resp.headers.get('content-type')}")
+        length = resp.headers.get("content-length")
+        if length and length.isdigit() and int(length) > IMAGE_MAX_BYTES:
+            raise ValueError(f"image too large: {length} bytes")
+        data = bytearray()
+        for chunk in resp.iter_bytes():
+            data += chunk
+            if len(data) > IMAGE_MAX_BYTES:
+                raise ValueError(f"image too large: over {IMAGE_MAX_BYTES} bytes")
+        return bytes(data)
+
+
+def refresh_images(db: Session, urls):
+    """
+    Fetch thumbnails for the given image URLs (as reported changed by
+    upsert_hackathons). URLs that already have a good thumbnail are skipped.
+    Returns counts of fetched/skipped/broken images.
+    """
+    urls = {u for u in urls if u and u.startswith("http")}
+    if not urls:
+        return {"fetched": 0, "skipped": 0, "broken": 0}
+
+    import httpx
+
+    assets = {
+        a.source_url: a
+        for a in db.query(ImageAsset).filter(ImageAsset.source_url.in_(urls))
+    }
+    fetched = skipped = broken = 0
+
+    with httpx.Client(
+        timeout=IMAGE_FETCH_TIMEOUT,
+        follow_redirects=True,
+        headers={"User-Agent": "Mozilla/5.0"},
+    ) as client:
+        for url in sorted(urls):
+            asset = assets.get(url)
+            if asset and asset.status == "ok" and os.path.exists(thumbnail_path(asset.content_hash)):
+                skipped += 1
+                continue
+            if asset is None:
+                asset = ImageAsset(source_url=url, status="broken")
+                db.add(asset)
+
+            try:
+                asset.content_hash = store_image(_download(client, url))
+                asset.status = "ok"
+                asset.error = None
+                fetched += 1
+            except Exception as e:
+                asset.content_hash = None
+                asset.status = "broken"
+                asset.error = str(e)[:500]
+                broken += 1
+                print(f"🖼️ Broken image {url}: {e}")
+
+    db.commit()
+    print(f"🖼️ Images: {fetched} fetched, {skipped} already cached, {broken} broken")
+    return {"fetched": fetched, "skipped": skipped, "broken": broken}
+
+
+def refresh_changed_images(upsert_result):
+    """Refresh thumbnails for an upsert_hackathons() result in a session of its own."""
+    urls = upsert_result.get("changed_image_urls") or []
+    if not urls:
+        return
+    db = WriteSession()
+    try:
+        refresh_images(db, urls)
+    except Exception as e:
+        print(f"❌ Image refresh failed: {e}")
+    finally:
+        db.close()
+
+
+def backfill_images(batch_size=100):
+    """
+    One-off: fetch thumbnails for every distinct stored image_url that has
+    never been tried (no ImageAsset row). Commits after each batch, so an
+    interrupted run picks up where it stopped.
+    """
+    db = WriteSession()
+    try:
+        urls = [
+            url for (url,) in db.query(Hackathon.image_url)
+            .outerjoin(ImageAsset, ImageAsset.source_url == Hackathon.image_url)
+            .filter(Hackathon.image_url.isnot(None), ImageAsset.id.is_(None))
+            .distinct()
+        ]
+        print(f"🖼️ Backfilling thumbnails for {len(urls)} image URLs")
+        totals = {"fetched": 0, "skipped": 0, "broken": 0}
+        for i in range(0, len(urls), batch_size):
+            for key, count in refresh_images(db, urls[i:i + batch_size]).items():
+                totals[key] += count
+        return totals
+    finally:
+        db.close()
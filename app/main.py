@@ -1,22 +1,75 @@
 import asyncio
+import os
 from fastapi import FastAPI
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError
-from .database import Base, engine, SessionLocal
-from .crud import upsert_hackathons, delete_expired_hackathons
+from .database import ReadSession, MaintenanceSession, pool_stats
+from .crud import (
+    upsert_hackathons,
+    delete_expired_hackathons,
+    hackathon_rows_query,
+    changes_since,
+    latest_change_version,
+    with_db_retry,
+)
+from scrapers.resilience import CircuitOpenError, breaker_states
+from .normalize import normalize_hackathons
+from .stats import read_stats
+from .profiling import (
+    PROFILE_SLOW_REQUEST_MS,
+    SlowRequestProfiler,
+    list_profiles,
+    profile_path,
+    profile_run,
+    span,
+)
+from .images import HASH_RE, thumbnail_path, refresh_changed_images
+from .work_queue import queue_status
+from .throttle import rate_limit, single_flight, throttle_stats
 from .models import Hackathon
-
-from .scheduler import start_scheduler
-from scrapers.aggregator import fetch_all_hackathons
-import httpx
-from fastapi import FastAPI, Depends
+from .schemas import HackathonOut, HACKATHON_FIELDS
+from .config import env_flag
+from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse, FileResponse
+from fastapi.middleware.gzip import GZipMiddleware
+import orjson
 
 from fastapi.middleware.cors import CORSMiddleware
 
+# Startup switches. Scrapers, Playwright, APScheduler and httpx are only
+# imported when the feature that needs them actually runs, so a read-only
+# replica (all three off) starts with just FastAPI + SQLAlchemy loaded.
+AUTO_CREATE_SCHEMA = env_flag("AUTO_CREATE_SCHEMA", True)
+ENABLE_SCHEDULER = env_flag("ENABLE_SCHEDULER", True)
+ENABLE_SELF_PING = env_flag("ENABLE_SELF_PING", True)
+SELF_PING_URL = os.getenv("SELF_PING_URL", "https://hackathon-backend-3stq.onrender.com/health")
+
+# Rows fetched per round-trip when streaming exports
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# How often the change stream checks the change log for new versions
+CHANGE_POLL_SECONDS = float(os.getenv("CHANGE_POLL_SECONDS", "5"))
+# Max changes returned per /hackathons/changes page or stream batch
+CHANGE_PAGE_SIZE = 1000
+# Responses smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+app = FastAPI(
+    title="Hackathon Aggregator API",
+    default_response_class=ORJSONResponse,
+    dependencies=[Depends(rate_limit)],
+)
 
-Base.metadata.create_all(bind=engine)
+if PROFILE_SLOW_REQUEST_MS > 0:
+    app.add_middleware(SlowRequestProfiler, threshold_ms=PROFILE_SLOW_REQUEST_MS)
 
-app = FastAPI(title="Hackathon Aggregator API")
+try:
+    # Optional: brotli compresses JSON noticeably better than gzip and
+    # falls back to gzip for clients that don't send "br"
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,9 +79,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Dependency
+# Dependencies: reads use the read pool (or replica), admin writes the maintenance pool
 def get_db():
-    db = SessionLocal()
+    db = ReadSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_maintenance_db():
+    db = MaintenanceSession()
     try:
         yield db
     finally:
@@ -36,76 +96,258 @@ def get_db():
 
 @app.on_event("startup")
 async def startup_event():
-    start_scheduler()
-    # Start the self-ping background task
-    asyncio.create_task(self_ping())
+    if AUTO_CREATE_SCHEMA:
+        # Prefer running `python -m app.migrate` as a deploy step and turning this off
+        from .migrate import create_schema
+        create_schema()
+    if ENABLE_SCHEDULER:
+        from .scheduler import start_scheduler
+        start_scheduler()
+    if ENABLE_SELF_PING:
+        # Start the self-ping background task
+        asyncio.create_task(self_ping())
 
 # Self-ping task
 async def self_ping():
-    url = "https://hackathon-backend-3stq.onrender.com/health"
+    import httpx
+
     async with httpx.AsyncClient() as client:
         while True:
             try:
-                resp = await client.get(url)
+                resp = await client.get(SELF_PING_URL)
                 print(f"Self-ping status: {resp.status_code}")
             except Exception as e:
                 print(f"Self-ping failed: {e}")
             await asyncio.sleep(5 * 60)  # 5 minutes
 
-@app.get("/hackathons")
+def parse_fields(fields: str | None):
+    """Turn ?fields=name,link into a validated tuple of column names."""
+    if not fields:
+        return HACKATHON_FIELDS
+    selected = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in HACKATHON_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown) or '(none given)'}. "
+                   f"Allowed: {', '.join(HACKATHON_FIELDS)}",
+        )
+    return selected
+
+
+@app.get("/hackathons", responses={200: {"model": list[HackathonOut]}})
 def fetch_hackathons(
     platform: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated columns, e.g. name,link,end_date"),
     db: Session = Depends(get_db)
 ):
-    # Simple get all for now
-    query = db.query(Hackathon)
-    if platform:
-        query = query.filter(Hackathon.platform == platform)
-    return query.all()
+    columns = parse_fields(fields)
+
+    def load():
+        with span("query"):
+            rows = hackathon_rows_query(db, columns, platform).all()
+        # Row tuples -> dicts; orjson serializes dates/datetimes natively
+        with span("serialize"):
+            return orjson.dumps([dict(zip(columns, row)) for row in rows])
+
+    # Identical concurrent requests share one query and one serialized body
+    body, _ = single_flight.do("hackathons", (platform, columns), load)
+    return Response(body, media_type="application/json")
+
+
+def _stream_rows(columns, platform, fmt):
+    # The request's session is gone once streaming starts, so use our own
+    db = ReadSession()
+    try:
+        rows = hackathon_rows_query(db, columns, platform).yield_per(EXPORT_BATCH_SIZE)
+        if fmt == "ndjson":
+            for row in rows:
+                yield orjson.dumps(dict(zip(columns, row))) + b"\n"
+        else:
+            yield b"["
+            first = True
+            for row in rows:
+                yield (b"" if first else b",") + orjson.dumps(dict(zip(columns, row)))
+                first = False
+            yield b"]"
+    finally:
+        db.close()
+
+
+@app.get("/hackathons/export")
+def export_hackathons(
+    platform: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated columns, e.g. name,link,end_date"),
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+):
+    """
+    Stream the full table without building it in memory: NDJSON (one object
+    per line) or a chunked JSON array.
+    """
+    columns = parse_fields(fields)
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(_stream_rows(columns, platform, format), media_type=media_type)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/admin/profiles")
+def admin_profiles():
+    """
+    Saved profiles (PROFILE_SCRAPES runs and requests slower than
+    PROFILE_SLOW_REQUEST_MS). *.folded files load into speedscope or flamegraph.pl.
+    """
+    return list_profiles()
+
+@app.get("/admin/profiles/{name}")
+def admin_profile(name: str):
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/json" if name.endswith(".json") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+@app.get("/pool-stats")
+def db_pool_stats():
+    """
+    Connection pool usage per workload (read / write / maintenance):
+    checkouts, wait times, timeouts and saturation.
+    """
+    return pool_stats()
+
+@app.get("/throttle-stats")
+def get_throttle_stats():
+    """
+    Rate-limit decisions per route and single-flight counters: "coalesced"
+    is the number of DB queries (or scrapes) saved by sharing a result.
+    "circuits" lists the breakers for scraped hosts and the database.
+    """
+    return {**throttle_stats(), "circuits": breaker_states()}
+
+@app.get("/scrape-queue")
+def scrape_queue(db: Session = Depends(get_db)):
+    """
+    Distributed scrape runs that are not merged yet, with task counts per
+    status (pending / claimed / done / failed).
+    """
+    return queue_status(db)
+
+# Row columns embedded in change-feed entries
+CHANGE_FIELDS = tuple(f for f in HACKATHON_FIELDS if f != "image_hash")
+
+
+@app.get("/hackathons/changes")
+def hackathon_changes(
+    since: int = Query(0, ge=0, description="Last version the client has seen"),
+    limit: int = Query(CHANGE_PAGE_SIZE, ge=1, le=CHANGE_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """
+    Inserted/updated/deleted hackathons after `since`. Keep calling with the
+    returned `version` until `has_more` is false.
+    """
+    changes = changes_since(db, since, limit, CHANGE_FIELDS)
+    version = changes[-1]["version"] if changes else max(since, latest_change_version(db))
+    return ORJSONResponse({
+        "version": version,
+        "has_more": len(changes) == limit,
+        "changes": changes,
+    })
+
+
+def _load_changes(since):
+    db = ReadSession()
+    try:
+        return changes_since(db, since, CHANGE_PAGE_SIZE, CHANGE_FIELDS)
+    finally:
+        db.close()
+
+
+@app.get("/hackathons/changes/stream")
+async def hackathon_changes_stream(request: Request, since: int = Query(0, ge=0)):
+    """
+    Server-Sent Events stream of the change log. Each event's id is its
+    version, so reconnecting browsers resume via Last-Event-ID.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def events():
+        cursor = since
+        while not await request.is_disconnected():
+            changes = await run_in_threadpool(_load_changes, cursor)
+            for change in changes:
+                cursor = change["version"]
+                yield b"id: %d\nevent: change\ndata: %s\n\n" % (cursor, orjson.dumps(change))
+            if len(changes) < CHANGE_PAGE_SIZE:
+                # Comment line keeps proxies from closing an idle connection
+                yield b": keep-alive\n\n"
+                await asyncio.sleep(CHANGE_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/images/{content_hash}")
+def get_image(content_hash: str):
+    """
+    Cached WebP thumbnail of a hackathon banner (see image_hash in /hackathons).
+    The URL is content-addressed, so it can be cached forever.
+    """
+    path = thumbnail_path(content_hash) if HASH_RE.match(content_hash) else None
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(
+        path,
+        media_type="image/webp",
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{content_hash}"',
+        },
+    )
+
 @app.post("/scrape-now")
-def scrape_now():
+def scrape_now(background_tasks: BackgroundTasks):
     """
     Scrape hackathons and save to DB with retry logic for SSL connection issues.
+    Calls arriving while a scrape is running wait for it and share its result.
     """
+    result, shared = single_flight.do("scrape-now", None, _scrape_now)
+    if not shared and result["status"] == "done":
+        background_tasks.add_task(refresh_changed_images, result["added"])
+    return result
+
+def _scrape_now():
+    from scrapers.aggregator import fetch_all_hackathons
+
     # First, fetch all hackathons data
     print("🔍 Starting scrape...")
-    data = fetch_all_hackathons()
-    print(f"📦 Scraped {len(data)} hackathons")
+    with profile_run("scrape-now"):
+        raw = fetch_all_hackathons()
+        with span("normalize"):
+            data, parse_report = normalize_hackathons(raw)
+        print(f"📦 Scraped {len(data)} hackathons")
 
-    # Create a NEW session after scraping to avoid connection timeout
-    db = SessionLocal()
-    max_retries = 3
-    retry_count = 0
-
-    while retry_count < max_retries:
+        # Each attempt gets a NEW session, created after scraping to avoid connection timeout
         try:
-            added = upsert_hackathons(db, data)
-            db.close()
-            return {"status": "done", "added": added}
-        except OperationalError as e:
-            retry_count += 1
-            print(f"⚠️ Database connection error (attempt {retry_count}/{max_retries}): {e}")
-            db.close()
-            # Create a fresh session for retry
-            db = SessionLocal()
-            if retry_count < max_retries:
-                print("🔄 Retrying with fresh connection...")
-                continue
-            else:
-                print("❌ Max retries reached. Connection failed.")
-                return {"status": "error", "message": "Database connection failed after retries"}
+            with span("upsert"):
+                added = with_db_retry(lambda db: upsert_hackathons(db, data))
+        except (OperationalError, CircuitOpenError) as e:
+            print(f"❌ Database connection failed: {e}")
+            return {"status": "error", "message": "Database connection failed after retries"}
         except Exception as e:
-            db.close()
             print(f"❌ Unexpected error: {e}")
             return {"status": "error", "message": str(e)}
 
+    return {"status": "done", "added": added, "parse_report": parse_report}
+
 @app.post("/cleanup-expired")
-def cleanup_expired(db: Session = Depends(get_db)):
+def cleanup_expired(db: Session = Depends(get_maintenance_db)):
     """
     Manually trigger cleanup of expired hackathons.
     Deletes hackathons where end_date < today's date.
@@ -117,6 +359,15 @@ def cleanup_expired(db: Session = Depends(get_db)):
         "message": f"Deleted {count} expired hackathons"
     }
 
+@app.get("/stats")
+def stats(db: Session = Depends(get_db)):
+    """
+    Hackathon counts overall, per platform, per month (of start date, else
+    end date) and per mode (online/offline/hybrid). Served from counters
+    maintained on every write, so cost doesn't grow with the table.
+    """
+    return read_stats(db)
+
 @app.get("/cleanup-status")
 def cleanup_status(db: Session = Depends(get_db)):
     """
@@ -124,17 +375,22 @@ def cleanup_status(db: Session = Depends(get_db)):
     """
     from datetime import date
     now = date.today()
-    
-    expired_count = db.query(Hackathon).filter(
-        Hackathon.end_date.isnot(None),
-        Hackathon.end_date < now
-    ).count()
-    
-    total_count = db.query(Hackathon).count()
-    
-    return {
-        "total_hackathons": total_count,
-        "expired_hackathons": expired_count,
-        "active_hackathons": total_count - expired_count
-    }
+
+    def load():
+        with span("query"):
+            expired_count = db.query(Hackathon).filter(
+                Hackathon.end_date.isnot(None),
+                Hackathon.end_date < now
+            ).count()
+
+            total_count = db.query(Hackathon).count()
+
+        return {
+            "total_hackathons": total_count,
+            "expired_hackathons": expired_count,
+            "active_hackathons": total_count - expired_count
+        }
+
+    result, _ = single_flight.do("cleanup-status", now, load)
+    return result
 
@@ -0,0 +1,26 @@
+"""
+Create/upgrade the database schema.
+
+Run once per deploy (``python -m app.migrate``) instead of on every API start,
+so read-only replicas never touch DDL.
+"""
+from .database import Base, maintenance_engine, MaintenanceSession
+from .models import Hackathon, HackathonStat
+from .stats import rebuild_stats
+
+
+def create_schema():
+    Base.metadata.create_all(bind=maintenance_engine)
+    print("🗄️ Database schema is up to date")
+
+    # Backfill /stats counters the first time they exist next to existing data
+    db = MaintenanceSession()
+    try:
+        if db.query(HackathonStat).first() is None and db.query(Hackathon).first() is not None:
+            rebuild_stats(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    create_schema()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, UniqueConstraint
 from .database import Base
 from datetime import datetime
 
@@ -27,3 +27,130 @@ class Hackathon(Base):
     image_url = Column(String, nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class HackathonStaging(Base):
+    """
+    One scrape, bulk-loaded before it is published. Rows of a scrape share a
+    batch_id; publishing diffs the batch against `hackathons` in SQL and
+    applies it in one short transaction, then deletes the batch.
+    """
+    __tablename__ = "hackathon_staging"
+    __table_args__ = (UniqueConstraint("batch_id", "external_id"),)
+
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(String, index=True, nullable=False)
+    external_id = Column(String, nullable=False)
+
+    name = Column(String, nullable=False)
+    platform = Column(String, nullable=False)
+    start_date = Column(Date, nullable=True)
+    end_date = Column(Date, nullable=True)
+    location = Column(String, nullable=True)
+    link = Column(String, nullable=True)
+    prize = Column(String, nullable=True)
+    participants = Column(String, nullable=True)
+    image_url = Column(String, nullable=True)
+
+    staged_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ImageAsset(Base):
+    """Thumbnail of a scraped image_url, stored in the local content-addressed store."""
+    __tablename__ = "image_assets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_url = Column(String, unique=True, index=True, nullable=False)
+
+    # sha256 of the original image bytes; thumbnail lives at <store>/<hash[:2]>/<hash>.webp
+    content_hash = Column(String, index=True, nullable=True)
+    # "ok" or "broken" (fetch/decode failed - see error)
+    status = Column(String, nullable=False)
+    error = Column(String, nullable=True)
+
+    fetched_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class HackathonChange(Base):
+    """
+    Append-only change log. Every insert/update/delete of a hackathon gets a
+    new, increasing version so clients can sync with ?since=<version>.
+    """
+    __tablename__ = "hackathon_changes"
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse versions
+
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    external_id = Column(String, index=True, nullable=False)
+    # "inserted", "updated" or "deleted"
+    op = Column(String, nullable=False)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class HackathonStat(Base):
+    """
+    Materialized counters behind /stats, e.g. ("platform", "Devpost") -> 120.
+    Kept in step with the hackathons table by the same transactions that
+    insert, update or delete hackathons.
+    """
+    __tablename__ = "hackathon_stats"
+
+    dimension = Column(String, primary_key=True)  # "total", "platform", "month", "mode"
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ScrapeRun(Base):
+    """
+    One distributed scrape: its URLs are queued as ScrapeTasks, and once they
+    are all finished exactly one worker merges the staged results.
+    """
+    __tablename__ = "scrape_runs"
+
+    run_id = Column(String, primary_key=True)
+    platforms = Column(String, nullable=False)  # comma-separated
+    # "queued" -> "merging" -> "merged"
+    status = Column(String, nullable=False, default="queued", index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    merge_started_at = Column(DateTime, nullable=True)
+    merged_at = Column(DateTime, nullable=True)
+
+
+class ScrapeTask(Base):
+    """A single URL of a distributed scrape, claimed by one worker at a time."""
+    __tablename__ = "scrape_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True, nullable=False)
+    platform = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    # "pending", "claimed", "done" or "failed" (out of attempts)
+    status = Column(String, nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    claimed_by = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(String, nullable=True)
+
+
+class ScrapeTaskLock(Base):
+    """
+    Claim marker for databases without SELECT ... FOR UPDATE SKIP LOCKED
+    (SQLite): the primary key lets only one worker insert a task's lock.
+    """
+    __tablename__ = "scrape_task_locks"
+
+    task_id = Column(Integer, primary_key=True)
+    worker_id = Column(String, nullable=False)
+    locked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ScrapeResult(Base):
+    """Raw scraped hackathons reported by a worker, waiting for the merge step."""
+    __tablename__ = "scrape_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True, nullable=False)
+    platform = Column(String, nullable=False)
+    worker_id = Column(String, nullable=False)
+    data = Column(Text, nullable=False)  # JSON list of scraped dicts
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
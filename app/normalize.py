@@ -0,0 +1,268 @@
+"""
+Normalization stage between the scrapers and upsert_hackathons.
+
+Scrapers emit loosely shaped dicts (MLH free-text dates like "Jan 10 - 12",
+Devpost no dates at all, free-text locations). normalize_hackathons() turns
+them into HackathonRecord objects with real dates and a canonical location,
+and reports how often parsing failed per platform.
+
+Date and location strings repeat heavily between runs (the same events are
+scraped every time), so both parsers are memoized with an LRU cache.
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+
+# ---------- DATES ---------- #
+
+_MONTHS = {
+    name: i
+    for i, names in enumerate(
+        [
+            ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+            ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+            ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+
+_EMPTY_VALUES = {"", "tbd", "tba", "n/a", "na", "none", "null", "unknown", "coming soon"}
+
+_ISO_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_NUMERIC_RE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+_MONTH_DAY_RE = re.compile(r"^([a-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?$")
+_DAY_MONTH_RE = re.compile(r"^(\d{1,2})(?:st|nd|rd|th)?\s+([a-z]{3,9})\.?(?:,?\s+(\d{4}))?$")
+_DAY_RE = re.compile(r"^(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?$")
+_MONTH_YEAR_RE = re.compile(r"^([a-z]{3,9})\.?,?\s+(\d{4})$")
+_WEEKDAY_RE = re.compile(r"\b(?:mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)[a-z]*\b,?\s*")
+_RANGE_SPLIT_RE = re.compile(r"\s*(?:[-–—]|\bto\b|\buntil\b|\bthrough\b)\s*")
+
+# Dates without a year are assumed to be this year, unless that puts them
+# further than this in the past (then it's next year's event).
+_YEAR_ROLLOVER = timedelta(days=180)
+
+
+def _parse_side(text):
+    """Parse one side of a range into (year|None, month|None, day) or None."""
+    text = text.strip(" ,.")
+    m = _NUMERIC_RE.match(text)
+    if m:
+        return int(m.group(3)), int(m.group(1)), int(m.group(2))
+    m = _MONTH_DAY_RE.match(text)
+    if m and m.group(1) in _MONTHS:
+        return (int(m.group(3)) if m.group(3) else None), _MONTHS[m.group(1)], int(m.group(2))
+    m = _DAY_MONTH_RE.match(text)
+    if m and m.group(2) in _MONTHS:
+        return (int(m.group(3)) if m.group(3) else None), _MONTHS[m.group(2)], int(m.group(1))
+    m = _MONTH_YEAR_RE.match(text)
+    if m and m.group(1) in _MONTHS:
+        return int(m.group(2)), _MONTHS[m.group(1)], 1
+    m = _DAY_RE.match(text)
+    if m:
+        return (int(m.group(2)) if m.group(2) else None), None, int(m.group(1))
+    return None
+
+
+@lru_cache(maxsize=8192)
+def _parse_date_range(text, today):
+    iso = _ISO_RE.findall(text)
+    if iso:
+        dates = [date(int(y), int(mo), int(d)) for y, mo, d in iso[:2]]
+        return dates[0], dates[-1]
+
+    cleaned = _WEEKDAY_RE.sub("", text.lower()).strip()
+    parts = [p for p in _RANGE_SPLIT_RE.split(cleaned, maxsplit=1) if p]
+    sides = [_parse_side(p) for p in parts]
+    if not sides or any(s is None for s in sides):
+        raise ValueError(f"unrecognized date: {text!r}")
+
+    start = sides[0]
+    end = sides[-1]
+    # "Jan 10 - 12, 2026": the end inherits the month, the start inherits the year
+    year_given = start[0] or end[0]
+    end_month = end[1] or start[1]
+    start_month = start[1] or end_month
+    if start_month is None:
+        raise ValueError(f"no month in date: {text!r}")
+
+    start_year = start[0] or end[0] or today.year
+    end_year = end[0] or start_year
+    start_date = date(start_year, start_month, start[2])
+    end_date = date(end_year, end_month, end[2])
+
+    if end_date < start_date and not start[0]:
+        # "Dec 30 - Jan 2, 2027"
+        start_date = start_date.replace(year=start_date.year - 1)
+    if not year_given and end_date < today - _YEAR_ROLLOVER:
+        start_date = start_date.replace(year=start_date.year + 1)
+        end_date = end_date.replace(year=end_date.year + 1)
+    if end_date < start_date:
+        raise ValueError(f"range ends before it starts: {text!r}")
+    return start_date, end_date
+
+
+def parse_date_range(value, today=None):
+    """
+    Parse "2026-01-10", "Jan 10 - 12, 2026", "Fri, Oct 3rd - Sun, Oct 5th",
+    "10/03/2026" etc. into (start, end). Returns None for empty/TBD values and
+    raises ValueError for text that isn't a recognizable date.
+    """
+    if isinstance(value, date):
+        return value, value
+    if not value or str(value).strip().lower() in _EMPTY_VALUES:
+        return None
+    return _parse_date_range(" ".join(str(value).split()), today or date.today())
+
+
+# ---------- LOCATIONS ---------- #
+
+ONLINE = "online"
+OFFLINE = "offline"
+HYBRID = "hybrid"
+
+_ONLINE_RE = re.compile(r"\b(online|virtual|remote|digital|worldwide|everywhere)\b")
+_HYBRID_RE = re.compile(r"\bhybrid\b")
+
+
+@lru_cache(maxsize=8192)
+def _parse_location(text):
+    lowered = text.lower()
+    if _HYBRID_RE.search(lowered):
+        return "Hybrid", HYBRID
+    if _ONLINE_RE.search(lowered):
+        return "Online", ONLINE
+    if lowered in ("offline", "in-person", "in person", "on-site", "onsite"):
+        return "Offline", OFFLINE
+    # "San Francisco ,CA ,  USA" -> "San Francisco, CA, USA"
+    parts = [p.strip() for p in text.split(",") if p.strip()]
+    return ", ".join(parts), OFFLINE
+
+
+def parse_location(value):
+    """
+    Canonicalize a free-text location. Returns (location, mode) where mode is
+    "online", "offline" or "hybrid"; (None, None) when there is no location.
+    """
+    if isinstance(value, dict):
+        # Some APIs return {"city": ..., "state": ..., "country": ...}
+        value = ", ".join(str(v) for k, v in value.items() if v and k in ("city", "state", "country", "name"))
+    if not value or str(value).strip().lower() in _EMPTY_VALUES:
+        return None, None
+    return _parse_location(" ".join(str(value).split()))
+
+
+# ---------- RECORDS ---------- #
+
+@dataclass(slots=True)
+class HackathonRecord:
+    name: str
+    platform: str
+    link: str | None = None
+    start_date: date | None = None
+    end_date: date | None = None
+    location: str | None = None
+    prize: str | None = None
+    participants: str | None = None
+    image_url: str | None = None
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class PlatformReport:
+    __slots__ = ("total", "invalid", "dates_parsed", "dates_missing", "dates_failed",
+                 "locations_parsed", "locations_missing")
+
+    def __init__(self):
+        for field in self.__slots__:
+            setattr(self, field, 0)
+
+    def as_dict(self):
+        report = {field: getattr(self, field) for field in self.__slots__}
+        total = max(self.total, 1)
+        report["date_failure_rate"] = round(self.dates_failed / total, 3)
+        report["location_missing_rate"] = round(self.locations_missing / total, 3)
+        return report
+
+
+def _clean_text(value):
+    if value is None:
+        return None
+    value = " ".join(str(value).split())
+    return value or None
+
+
+def normalize_hackathon(raw, report, today=None):
+    """Validate one scraped dict into a HackathonRecord (None if unusable)."""
+    report.total += 1
+
+    name = _clean_text(raw.get("name"))
+    platform = _clean_text(raw.get("platform"))
+    if not name or not platform:
+        report.invalid += 1
+        return None
+
+    start = end = None
+    date_text = raw.get("start_date") or raw.get("date")
+    try:
+        parsed = parse_date_range(date_text, today)
+        if parsed is None:
+            report.dates_missing += 1
+        else:
+            start, end = parsed
+            report.dates_parsed += 1
+    except (ValueError, OverflowError):
+        report.dates_failed += 1
+
+    if raw.get("end_date"):
+        try:
+            parsed_end = parse_date_range(raw["end_date"], today)
+            if parsed_end:
+                end = parsed_end[1]
+        except (ValueError, OverflowError):
+            pass
+
+    location, _mode = parse_location(raw.get("location"))
+    if location is None:
+        report.locations_missing += 1
+    else:
+        report.locations_parsed += 1
+
+    link = _clean_text(raw.get("link"))
+    return HackathonRecord(
+        name=name,
+        platform=platform,
+        link=link,
+        start_date=start,
+        end_date=end,
+        location=location,
+        prize=_clean_text(raw.get("prize")),
+        participants=_clean_text(raw.get("participants")),
+        image_url=_clean_text(raw.get("image_url")),
+    )
+
+
+def normalize_hackathons(raw_hackathons, today=None):
+    """
+    Normalize a scrape's output. Returns (records, reports) where records are
+    dicts ready for upsert_hackathons and reports maps platform -> counters.
+    """
+    reports = defaultdict(PlatformReport)
+    records = []
+    for raw in raw_hackathons:
+        record = normalize_hackathon(raw, reports[raw.get("platform") or "Unknown"], today)
+        if record is not None:
+            records.append(record.to_dict())
+
+    for platform, report in reports.items():
+        print(
+            f"📐 {platform}: {report.total} scraped, {report.invalid} invalid, "
+            f"dates parsed {report.dates_parsed} / missing {report.dates_missing} / "
+            f"failed {report.dates_failed} ({report.dates_failed / max(report.total, 1):.0%}), "
+            f"locations missing {report.locations_missing}"
+        )
+    return records, {platform: report.as_dict() for platform, report in reports.items()}
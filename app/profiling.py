@@ -0,0 +1,296 @@
+"""
+Opt-in profiling for scrape runs and slow API requests.
+
+Two kinds of data, both written to PROFILE_DIR in the "folded stacks" format
+understood by flamegraph.pl, speedscope and inferno:
+
+- Sampled CPU stacks (<name>.cpu.folded): a background thread snapshots the
+  Python stacks of the profiled thread(s) every PROFILE_SAMPLE_INTERVAL_MS.
+- Wall-clock spans (<name>.spans.folded / .spans.json): code marks stages with
+  `with span("navigation"):`; nesting builds paths like
+  scrape;Devpost;navigation weighted by self-time in milliseconds.
+
+Only the standard library is used, so this module is safe to import from the
+scrapers and costs nothing when profiling is off.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from .config import env_flag
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+# Profile every scheduled / manual scrape run
+PROFILE_SCRAPES = env_flag("PROFILE_SCRAPES", False)
+# Save a profile for API requests slower than this; 0 turns the middleware off
+PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "10")) / 1000
+# Cap on stack samples kept per request (about a minute at the default interval)
+MAX_REQUEST_SAMPLES = int(os.getenv("PROFILE_MAX_SAMPLES", "6000"))
+
+PROFILE_NAME_RE = re.compile(r"^[\w.\-]+$")
+
+# Frames whose leaf is one of these files are idle threads, not work
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+_current_profile = ContextVar("current_profile", default=None)
+
+
+# ---------- SAMPLING ---------- #
+
+def _stack_of(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    stack.reverse()
+    return ";".join(stack)
+
+
+def _sample(frames, thread_ids, counts):
+    """Add the current stack of each busy thread in thread_ids to counts."""
+    taken = 0
+    for tid in thread_ids:
+        frame = frames.get(tid)
+        if frame is None or frame.f_code.co_filename.endswith(_IDLE_FILES):
+            continue
+        counts[_stack_of(frame)] += 1
+        taken += 1
+    return taken
+
+
+class StackSampler:
+    """Periodically counts the Python stacks of the given threads."""
+
+    def __init__(self, thread_ids, interval=SAMPLE_INTERVAL):
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            _sample(sys._current_frames(), self.thread_ids, self.samples)
+
+
+# ---------- SPANS ---------- #
+
+class Profile:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []   # (path, start_offset_s, duration_s)
+        self._stack = []
+        # Threads currently working for this profile; only these are sampled
+        self.thread_ids = set()
+        self.samples = Counter()
+        self.sample_count = 0
+
+    def folded_spans(self):
+        """Self-time per span path in ms, as folded stacks."""
+        totals = Counter()
+        for path, _, duration in self.spans:
+            totals[path] += duration
+        child_totals = Counter()
+        for path, duration in totals.items():
+            if ";" in path:
+                child_totals[path.rsplit(";", 1)[0]] += duration
+        return Counter({
+            path: max(round((total - child_totals[path]) * 1000), 0)
+            for path, total in totals.items()
+        })
+
+
+@contextmanager
+def span(name):
+    """Time a stage of the active profile. A no-op when nothing is being profiled."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    # Threadpool workers join the profile for the span they run, so request
+    # profiles sample them; the outermost span on a thread removes it again
+    tid = threading.get_ident()
+    joined = tid not in profile.thread_ids
+    profile.thread_ids.add(tid)
+    profile._stack.append(name)
+    path = ";".join(profile._stack)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans.append((path, started - profile.started, time.perf_counter() - started))
+        profile._stack.pop()
+        if joined:
+            profile.thread_ids.discard(tid)
+
+
+# ---------- OUTPUT ---------- #
+
+def _write_folded(path, counts):
+    with open(path, "w") as f:
+        for stack, count in sorted(counts.items()):
+            if count:
+                f.write(f"{stack} {count}\n")
+
+
+def save_profile(profile, cpu_samples=None, extra=None):
+    """Write a profile's spans (and CPU samples) to PROFILE_DIR; returns the file stem."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_name = re.sub(r"[^\w.-]+", "_", profile.name)
+    stem = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{safe_name}"
+    if profile.spans:
+        _write_folded(os.path.join(PROFILE_DIR, f"{stem}.spans.folded"), profile.folded_spans())
+    with open(os.path.join(PROFILE_DIR, f"{stem}.spans.json"), "w") as f:
+        json.dump({
+            "name": profile.name,
+            "duration_ms": round((time.perf_counter() - profile.started) * 1000, 3),
+            **(extra or {}),
+            "spans": [
+                {"path": path, "start_ms": round(start * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+                for path, start, duration in profile.spans
+            ],
+        }, f, indent=2)
+    if cpu_samples:
+        _write_folded(os.path.join(PROFILE_DIR, f"{stem}.cpu.folded"), cpu_samples)
+    print(f"🔬 Saved profile {stem} to {PROFILE_DIR}")
+    return stem
+
+
+@contextmanager
+def profile_run(name, enabled=None):
+    """
+    Profile everything inside the block (CPU samples of this thread + spans)
+    and save it when the block exits. Defaults to on when PROFILE_SCRAPES is set.
+    """
+    if not (PROFILE_SCRAPES if enabled is None else enabled):
+        yield None
+        return
+    profile = Profile(name)
+    token = _current_profile.set(profile)
+    sampler = StackSampler([threading.get_ident()]).start()
+    try:
+        with span(name):
+            yield profile
+    finally:
+        sampler.stop()
+        _current_profile.reset(token)
+        save_profile(profile, sampler.samples)
+
+
+def list_profiles():
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    files = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.is_file() and PROFILE_NAME_RE.match(entry.name):
+            stat = entry.stat()
+            files.append({
+                "name": entry.name,
+                "size": stat.st_size,
+                "modified": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+            })
+    return sorted(files, key=lambda f: f["modified"], reverse=True)
+
+
+def profile_path(name):
+    """Path of a saved profile file, or None for unknown/unsafe names."""
+    if not PROFILE_NAME_RE.match(name):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+# ---------- SLOW REQUESTS ---------- #
+
+class SlowRequestProfiler:
+    """
+    ASGI middleware. While requests are in flight, one shared sampler thread
+    records, per request, the stacks of the threads serving it: the event
+    loop plus threadpool workers inside one of its spans. Requests slower
+    than PROFILE_SLOW_REQUEST_MS get those samples, plus their spans, saved
+    as a profile. Event streams (long-lived by design) are not profiled, and
+    each request keeps at most PROFILE_MAX_SAMPLES samples.
+    """
+
+    def __init__(self, app, threshold_ms=PROFILE_SLOW_REQUEST_MS):
+        self.app = app
+        self.threshold = threshold_ms / 1000
+        self._lock = threading.Lock()
+        self._active = set()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _enter(self, profile):
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _leave(self, profile):
+        with self._lock:
+            self._active.discard(profile)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                # Nothing in flight: sleep until the next request arrives
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            time.sleep(SAMPLE_INTERVAL)
+            frames = sys._current_frames()
+            for profile in active:
+                if profile.sample_count < MAX_REQUEST_SAMPLES:
+                    profile.sample_count += _sample(frames, list(profile.thread_ids), profile.samples)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.threshold <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(f"{scope['method']}{scope['path']}")
+        profile.thread_ids.add(threading.get_ident())  # the event loop
+        streaming = False
+
+        async def watch_send(message):
+            nonlocal streaming
+            if message["type"] == "http.response.start" and not streaming:
+                content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+                if content_type.startswith(b"text/event-stream"):
+                    streaming = True
+                    self._leave(profile)
+            await send(message)
+
+        token = _current_profile.set(profile)
+        self._enter(profile)
+        try:
+            await self.app(scope, receive, watch_send)
+        finally:
+            finished = time.perf_counter()
+            _current_profile.reset(token)
+            self._leave(profile)
+            if not streaming and finished - profile.started >= self.threshold:
+                # Copy: the sampler may still be finishing a tick for this request
+                save_profile(profile, dict(profile.samples), {"query": scope.get("query_string", b"").decode()})
@@ -1,35 +1,197 @@
 # app/scheduler.py
+import os
+import threading
+from datetime import datetime
+
 from apscheduler.schedulers.background import BackgroundScheduler
-from scrapers.aggregator import fetch_all_hackathons
-from app.database import SessionLocal
-from app.crud import upsert_hackathons, delete_expired_hackathons
+from apscheduler.triggers.interval import IntervalTrigger
+from app.config import env_flag
+from app.database import MaintenanceSession, WriteSession
+from app.crud import upsert_hackathons, delete_expired_hackathons, discard_staged, with_db_retry
+from app.normalize import normalize_hackathons
+from app.images import refresh_changed_images
+from app.profiling import profile_run, span
 
-def scrape_and_update_db():
-    print("🔄 Running scheduled scrape...")
-    db = SessionLocal()
+# Starting interval (hours) per platform. Intervals adapt from here based on
+# how many new/changed records each scrape produces.
+PLATFORM_SCHEDULES = {
+    "Devpost": 12,
+    "Unstop": 12,
+    "MLH": 24,
+}
+
+MIN_INTERVAL_HOURS = float(os.getenv("SCRAPE_MIN_INTERVAL_HOURS", "3"))
+MAX_INTERVAL_HOURS = float(os.getenv("SCRAPE_MAX_INTERVAL_HOURS", "72"))
+# Random +/- fraction of the interval added to each run so platforms drift apart
+JITTER_FRACTION = float(os.getenv("SCRAPE_JITTER_FRACTION", "0.1"))
+# Max number of browser-driven scrapes running at the same time
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "1"))
+# How long a job waits for a free slot before giving up until its next run
+SCRAPE_BUDGET_WAIT_SECONDS = int(os.getenv("SCRAPE_BUDGET_WAIT_SECONDS", "3600"))
+# Queue URLs for scrape_worker.py nodes instead of scraping in this process
+SCRAPE_DISTRIBUTED = env_flag("SCRAPE_DISTRIBUTED", False)
+# Share of a scrape's records that must be new/changed to count as "busy"
+BUSY_CHANGE_RATE = 0.1
+
+scheduler = None
+_scrape_budget = threading.BoundedSemaphore(SCRAPE_CONCURRENCY)
+platform_state = {
+    platform: {
+        "interval_hours": float(hours),
+        "failures": 0,
+        "last_run": None,
+        "last_changes": None,
+    }
+    for platform, hours in PLATFORM_SCHEDULES.items()
+}
+
+
+def _clamp_interval(hours):
+    return max(MIN_INTERVAL_HOURS, min(MAX_INTERVAL_HOURS, hours))
+
+
+def _interval_trigger(hours):
+    return IntervalTrigger(
+        hours=hours,
+        jitter=int(hours * 3600 * JITTER_FRACTION) or None,
+    )
+
+
+def next_interval(current_hours, changes, total):
+    """
+    Adapt a platform's interval to how much its data actually changes:
+    no changes -> back off, some changes -> tighten, lots of changes -> halve.
+    """
+    if changes == 0:
+        hours = current_hours * 1.5
+    elif changes / max(total, 1) >= BUSY_CHANGE_RATE:
+        hours = current_hours * 0.5
+    else:
+        hours = current_hours * 0.75
+    return _clamp_interval(hours)
+
+
+def failure_interval(failures):
+    """
+    Exponential backoff for a platform whose scrape keeps failing: retry soon
+    after a one-off failure, then wait longer each time it fails again.
+    """
+    return _clamp_interval(MIN_INTERVAL_HOURS * (2 ** (failures - 1)))
+
+
+def _reschedule(platform, hours):
+    if scheduler is not None:
+        scheduler.reschedule_job(f"scrape_{platform}", trigger=_interval_trigger(hours))
+
+
+def scrape_platform(platform):
+    """Scheduled job: scrape one platform and adapt its next interval."""
+    state = platform_state[platform]
+
+    if SCRAPE_DISTRIBUTED:
+        # Workers scrape and merge; the interval stays fixed in this mode
+        from app.work_queue import enqueue_scrape_run
+
+        db = WriteSession()
+        try:
+            enqueue_scrape_run(db, [platform])
+        finally:
+            db.close()
+        return
+
+    if not _scrape_budget.acquire(timeout=SCRAPE_BUDGET_WAIT_SECONDS):
+        print(f"⏳ {platform}: no free scrape slot, skipping this run")
+        return
+
+    from scrapers.aggregator import fetch_platform_urls
+
+    print(f"🔄 Running scheduled scrape for {platform}...")
     try:
-        hackathons = fetch_all_hackathons()
-        added = upsert_hackathons(db, hackathons)
-        print(f"✅ Scheduled scrape done. {added} new hackathons added.")
+        with profile_run(f"scrape-{platform}"):
+            raw, failed_urls = fetch_platform_urls(platform)
+            with span("normalize"):
+                hackathons, _ = normalize_hackathons(raw)
+            if not hackathons:
+                raise RuntimeError("scrape returned no hackathons")
+            with span("upsert"):
+                result = with_db_retry(lambda db: upsert_hackathons(db, hackathons))
+    except Exception as e:
+        state["failures"] += 1
+        hours = failure_interval(state["failures"])
+        print(f"❌ {platform} scrape failed ({state['failures']} in a row): {e}")
+        print(f"⏰ {platform}: retrying in {hours:.1f}h")
+        _reschedule(platform, hours)
+        return
     finally:
-        db.close()
+        _scrape_budget.release()
+
+    changes = result["inserted"] + result["updated"]
+    if failed_urls:
+        # Keep what was scraped, but a partial run (timeouts, open circuit)
+        # backs off like a failure instead of stretching the interval
+        state["failures"] += 1
+        hours = failure_interval(state["failures"])
+        print(
+            f"⚠️ {platform} scrape incomplete: {len(failed_urls)} URLs failed, "
+            f"{changes} new/changed of {result['total']}, retrying in {hours:.1f}h"
+        )
+        _reschedule(platform, hours)
+        refresh_changed_images(result)
+        return
+
+    state["failures"] = 0
+    state["last_run"] = datetime.utcnow()
+    state["last_changes"] = changes
+    state["interval_hours"] = next_interval(state["interval_hours"], changes, result["total"])
+    print(
+        f"✅ {platform} scrape done. {changes} new/changed of {result['total']}, "
+        f"next run in {state['interval_hours']:.1f}h"
+    )
+    _reschedule(platform, state["interval_hours"])
+    refresh_changed_images(result)
+
+
+def scrape_and_update_db():
+    """Scrape every platform once and publish the result (run_scraper.py)."""
+    from scrapers.aggregator import fetch_all_hackathons
+
+    with profile_run("scrape-all"):
+        raw = fetch_all_hackathons()
+        with span("normalize"):
+            hackathons, _ = normalize_hackathons(raw)
+        with span("upsert"):
+            result = with_db_retry(lambda db: upsert_hackathons(db, hackathons))
+    refresh_changed_images(result)
+    return result
 
 def cleanup_expired_hackathons():
     """Scheduled job to delete expired hackathons"""
     print("🧹 Running scheduled cleanup of expired hackathons...")
-    db = SessionLocal()
+    db = MaintenanceSession()
     try:
         count = delete_expired_hackathons(db)
         print(f"✅ Cleanup complete. {count} expired hackathons deleted.")
+        stale = discard_staged(db)
+        if stale:
+            print(f"🧹 Purged {stale} rows of abandoned staging batches")
     finally:
         db.close()
 
 def start_scheduler():
+    global scheduler
     scheduler = BackgroundScheduler()
-    # Run scraping every 24 hours
-    scheduler.add_job(scrape_and_update_db, "interval", hours=24, id="daily_scrape")
+    # One scrape job per platform, each on its own adaptive interval
+    for platform, state in platform_state.items():
+        scheduler.add_job(
+            scrape_platform,
+            _interval_trigger(state["interval_hours"]),
+            args=[platform],
+            id=f"scrape_{platform}",
+            max_instances=1,
+            coalesce=True,
+        )
     # Run cleanup every 12 hours (adjust as needed)
     scheduler.add_job(cleanup_expired_hackathons, "interval", hours=12, id="cleanup_expired")
     scheduler.start()
-    print("⏰ Scheduler started - scraping every 24h, cleanup every 12h.")
-
+    schedules = ", ".join(f"{p} every {s['interval_hours']:g}h" for p, s in platform_state.items())
+    print(f"⏰ Scheduler started - scraping {schedules}, cleanup every 12h.")
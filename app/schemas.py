@@ -0,0 +1,26 @@
+from datetime import date, datetime
+from pydantic import BaseModel
+
+
+class HackathonOut(BaseModel):
+    """Public shape of a hackathon in API responses."""
+
+    id: int
+    external_id: str
+    name: str
+    platform: str
+    start_date: date | None = None
+    end_date: date | None = None
+    location: str | None = None
+    link: str | None = None
+    prize: str | None = None
+    participants: str | None = None
+    image_url: str | None = None
+    # Serve the cached thumbnail from /images/{image_hash}
+    image_hash: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
+# Columns clients may request via ?fields=..., in response order
+HACKATHON_FIELDS = tuple(HackathonOut.model_fields)
@@ -0,0 +1,89 @@
+"""
+Incrementally maintained counters for /stats.
+
+Instead of counting the hackathons table on every request, each write path
+passes the rows it touched through stat_keys() and applies +1/-1 deltas to
+the small hackathon_stats table in the same transaction.
+"""
+from collections import Counter
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .models import Hackathon, HackathonStat
+from .normalize import parse_location
+
+UNKNOWN = "unknown"
+
+
+def stat_keys(platform, location, start_date, end_date):
+    """The (dimension, key) counters one hackathon contributes to."""
+    event_date = start_date or end_date
+    mode = parse_location(location)[1]
+    return (
+        ("total", "all"),
+        ("platform", platform or UNKNOWN),
+        ("month", event_date.strftime("%Y-%m") if event_date else UNKNOWN),
+        ("mode", mode or UNKNOWN),
+    )
+
+
+def row_stat_keys(row):
+    return stat_keys(row.platform, row.location, row.start_date, row.end_date)
+
+
+def apply_stat_deltas(db: Session, deltas: Counter):
+    """
+    Add deltas to the counters in one upsert, so two writers creating the same
+    new key (a new month or platform) can't collide on the primary key. Does
+    not commit; the caller's transaction does.
+    """
+    # Sorted so concurrent writers lock counter rows in the same order
+    rows = [
+        {"dimension": dimension, "key": key, "count": delta}
+        for (dimension, key), delta in sorted(deltas.items())
+        if delta
+    ]
+    if not rows:
+        return
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(HackathonStat)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[HackathonStat.dimension, HackathonStat.key],
+        set_={"count": HackathonStat.count + stmt.excluded.count},
+    )
+    db.execute(stmt, rows)
+
+
+def rebuild_stats(db: Session):
+    """Recount everything from scratch (first deploy, or after manual DB edits)."""
+    counts = Counter()
+    rows = db.query(
+        Hackathon.platform, Hackathon.location, Hackathon.start_date, Hackathon.end_date
+    ).yield_per(1000)
+    for row in rows:
+        counts.update(row_stat_keys(row))
+
+    db.query(HackathonStat).delete(synchronize_session=False)
+    db.add_all(
+        HackathonStat(dimension=dimension, key=key, count=count)
+        for (dimension, key), count in counts.items()
+    )
+    db.commit()
+    print(f"📊 Rebuilt stats for {counts[('total', 'all')]} hackathons")
+
+
+def read_stats(db: Session):
+    stats = {"total": 0, "by_platform": {}, "by_month": {}, "by_mode": {}}
+    for dimension, key, count in db.query(
+        HackathonStat.dimension, HackathonStat.key, HackathonStat.count
+    ):
+        if count <= 0:
+            continue
+        if dimension == "total":
+            stats["total"] = count
+        else:
+            stats[f"by_{dimension}"][key] = count
+    stats["by_month"] = dict(sorted(stats["by_month"].items()))
+    return stats
@@ -0,0 +1,190 @@
+"""
+Per-instance request protection for the API.
+
+- Token-bucket rate limiting per client and per route. Mutating (POST)
+  routes get a much smaller bucket than reads. Buckets live in memory, so
+  limits apply per API instance.
+- Single-flight coalescing: concurrent identical reads share one DB query
+  (and one serialized response) instead of each running their own.
+
+Both keep counters, served by /throttle-stats.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+
+from fastapi import HTTPException, Request
+
+from .config import env_flag
+
+ENABLE_RATE_LIMIT = env_flag("ENABLE_RATE_LIMIT", True)
+# Reads: sustained requests per minute per client and route, plus burst size
+READ_PER_MINUTE = float(os.getenv("RATE_LIMIT_READ_PER_MINUTE", "120"))
+READ_BURST = int(os.getenv("RATE_LIMIT_READ_BURST", "30"))
+# Writes (/scrape-now, /cleanup-expired): one every 5 minutes, burst of 2
+WRITE_PER_MINUTE = float(os.getenv("RATE_LIMIT_WRITE_PER_MINUTE", "0.2"))
+WRITE_BURST = int(os.getenv("RATE_LIMIT_WRITE_BURST", "2"))
+# Proxies in front of the API that append to X-Forwarded-For (1 on Render)
+TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+# Route templates that are never throttled: liveness probes / self-ping, and
+# immutable thumbnails, which a single listing page loads dozens of at once
+EXEMPT_PATHS = {"/health", "/images/{content_hash}"}
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Idle buckets are dropped once there are more than this many
+MAX_BUCKETS = 10000
+
+
+# ---------- RATE LIMITING ---------- #
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now):
+        """Spend a token. Returns 0 if allowed, else seconds until one is available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # (client, method, route) -> TokenBucket
+        self.counters = defaultdict(lambda: {"allowed": 0, "limited": 0})
+
+    def check(self, client, method, route):
+        """Returns 0 if the request may proceed, else the Retry-After in seconds."""
+        if method in MUTATING_METHODS:
+            limits = (WRITE_PER_MINUTE, WRITE_BURST)
+        else:
+            limits = (READ_PER_MINUTE, READ_BURST)
+        now = time.monotonic()
+        with self._lock:
+            key = (client, method, route)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= MAX_BUCKETS:
+                    self._prune(now)
+                bucket = self._buckets[key] = TokenBucket(*limits)
+            wait = bucket.take(now)
+            self.counters[f"{method} {route}"]["limited" if wait else "allowed"] += 1
+        return wait
+
+    def _prune(self, now):
+        # A full bucket behaves exactly like a brand new one, so it can go
+        self._buckets = {k: b for k, b in self._buckets.items() if not b.is_full(now)}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients_tracked": len(self._buckets),
+                "routes": {route: dict(c) for route, c in sorted(self.counters.items())},
+            }
+
+
+rate_limiter = RateLimiter()
+
+
+def client_id(request: Request):
+    """Client IP, taken from X-Forwarded-For only as far as our own proxies wrote it."""
+    forwarded = request.headers.get("x-forwarded-for")
+    if TRUSTED_PROXIES and forwarded:
+        hops = [h.strip() for h in forwarded.split(",") if h.strip()]
+        if hops:
+            return hops[-min(TRUSTED_PROXIES, len(hops))]
+    return request.client.host if request.client else "unknown"
+
+
+async def rate_limit(request: Request):
+    """App-wide dependency: 429 with Retry-After once a client's bucket is empty."""
+    if not ENABLE_RATE_LIMIT:
+        return
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    if path in EXEMPT_PATHS:
+        return
+    wait = rate_limiter.check(client_id(request), request.method, path)
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, slow down",
+            headers={"Retry-After": str(max(1, round(wait)))},
+        )
+
+
+# ---------- SINGLE-FLIGHT ---------- #
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs fn() once for all concurrent callers with the same key; the others
+    wait for and share its result (or exception). Nothing is cached once the
+    call finishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.counters = defaultdict(lambda: {"executed": 0, "coalesced": 0})
+
+    def do(self, name, key, fn):
+        """Returns (result, shared); shared is True for callers that didn't run fn."""
+        with self._lock:
+            call = self._calls.get((name, key))
+            leader = call is None
+            if leader:
+                call = self._calls[(name, key)] = _Call()
+            self.counters[name]["executed" if leader else "coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[(name, key)]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(c) for name, c in sorted(self.counters.items())}
+
+
+single_flight = SingleFlight()
+
+
+def throttle_stats():
+    return {"rate_limit": rate_limiter.stats(), "single_flight": single_flight.stats()}
@@ -0,0 +1,340 @@
+"""
+DB-backed queue for spreading scrape work across several scraper nodes.
+
+- enqueue_scrape_run() turns every URL of the chosen platforms into a
+  ScrapeTask belonging to a new ScrapeRun.
+- Workers (scrape_worker.py) claim batches of pending tasks, scrape them and
+  stage the results in scrape_results, marking the tasks done in the same
+  transaction. Claims use SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL and
+  the scrape_task_locks table elsewhere (SQLite).
+- Once a run has no open tasks, merge_ready_runs() lets exactly one worker
+  normalize the staged results and feed them to upsert_hackathons.
+
+A worker that dies mid-batch loses its claims after TASK_LEASE_SECONDS; the
+tasks go back to pending until they run out of attempts.
+"""
+import json
+import os
+import socket
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .database import WriteSession
+from .models import ScrapeRun, ScrapeTask, ScrapeTaskLock, ScrapeResult
+from .crud import upsert_hackathons, with_db_retry
+from .normalize import normalize_hackathons
+from .images import refresh_changed_images
+
+# Tasks claimed per round trip; a worker scrapes a batch in one browser session
+TASK_BATCH_SIZE = int(os.getenv("SCRAPE_TASK_BATCH_SIZE", "5"))
+# A claim older than this is treated as an abandoned (crashed) worker
+TASK_LEASE_SECONDS = int(os.getenv("SCRAPE_TASK_LEASE_SECONDS", "900"))
+TASK_MAX_ATTEMPTS = int(os.getenv("SCRAPE_TASK_MAX_ATTEMPTS", "3"))
+WORKER_POLL_SECONDS = float(os.getenv("SCRAPE_WORKER_POLL_SECONDS", "10"))
+
+OPEN_STATUSES = ("pending", "claimed")
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _supports_skip_locked(db: Session):
+    return db.get_bind().dialect.name == "postgresql"
+
+
+# ---------- ENQUEUE ---------- #
+
+def enqueue_scrape_run(db: Session, platforms=None):
+    """
+    Queue one task per URL of each platform. Platforms that still have an
+    unmerged run are skipped, so a slow run isn't queued twice. Returns the
+    new run_id, or None when there was nothing to queue.
+    """
+    from scrapers.aggregator import PLATFORM_URLS
+
+    busy = set()
+    for (run_platforms,) in db.query(ScrapeRun.platforms).filter(ScrapeRun.status != "merged"):
+        busy.update(run_platforms.split(","))
+
+    platforms = [p for p in (platforms or PLATFORM_URLS) if p not in busy]
+    if not platforms:
+        print("⏳ Every requested platform already has a scrape run in progress")
+        return None
+
+    run_id = uuid.uuid4().hex
+    db.add(ScrapeRun(run_id=run_id, platforms=",".join(platforms)))
+    db.add_all(
+        ScrapeTask(run_id=run_id, platform=platform, url=url)
+        for platform in platforms
+        for url in PLATFORM_URLS[platform]
+    )
+    db.commit()
+    print(f"📋 Queued scrape run {run_id} for {', '.join(platforms)}")
+    return run_id
+
+
+# ---------- CLAIM / COMPLETE ---------- #
+
+def release_expired_claims(db: Session):
+    """Hand tasks of workers that stopped reporting back to the queue."""
+    cutoff = datetime.utcnow() - timedelta(seconds=TASK_LEASE_SECONDS)
+    query = db.query(ScrapeTask).filter(
+        ScrapeTask.status == "claimed",
+        ScrapeTask.claimed_at < cutoff,
+    )
+    if _supports_skip_locked(db):
+        query = query.with_for_update(skip_locked=True)
+    expired = query.all()
+    for task in expired:
+        print(f"⌛ Claim on task {task.id} by {task.claimed_by} expired")
+        task.status = "pending" if task.attempts < TASK_MAX_ATTEMPTS else "failed"
+        task.error = "claim expired"
+    if expired:
+        db.query(ScrapeTaskLock).filter(
+            ScrapeTaskLock.task_id.in_([t.id for t in expired])
+        ).delete(synchronize_session=False)
+    return len(expired)
+
+
+def claim_tasks(db: Session, worker_id, limit=TASK_BATCH_SIZE):
+    """Claim up to `limit` pending tasks for this worker."""
+    release_expired_claims(db)
+    pending = db.query(ScrapeTask).filter(ScrapeTask.status == "pending").order_by(ScrapeTask.id)
+
+    if _supports_skip_locked(db):
+        # Rows locked by other workers' claim transactions are skipped, not waited on
+        tasks = pending.limit(limit).with_for_update(skip_locked=True).all()
+    else:
+        tasks = []
+        for task in pending.limit(limit * 4).all():
+            if len(tasks) == limit:
+                break
+            locked = db.execute(
+                sqlite_insert(ScrapeTaskLock)
+                .values(task_id=task.id, worker_id=worker_id, locked_at=datetime.utcnow())
+                .on_conflict_do_nothing()
+            )
+            if locked.rowcount == 1:  # otherwise another worker got there first
+                tasks.append(task)
+
+    now = datetime.utcnow()
+    for task in tasks:
+        task.status = "claimed"
+        task.claimed_by = worker_id
+        task.claimed_at = now
+        task.attempts += 1
+    db.commit()
+    return tasks
+
+
+def complete_tasks(db: Session, run_id, task_ids, worker_id, hackathons):
+    """Stage a batch's results and mark its tasks done in one transaction."""
+    owned = db.query(ScrapeTask).filter(
+        ScrapeTask.id.in_(task_ids),
+        ScrapeTask.status == "claimed",
+        ScrapeTask.claimed_by == worker_id,
+    ).update(
+        {"status": "done", "finished_at": datetime.utcnow(), "error": None},
+        synchronize_session=False,
+    )
+    if owned == 0:
+        # Lease expired and someone else took the batch over; drop our copy
+        db.rollback()
+        print(f"⚠️ {worker_id} lost its claim on tasks {task_ids}, discarding results")
+        return False
+
+    by_platform = defaultdict(list)
+    for h in hackathons:
+        by_platform[h["platform"]].append(h)
+    db.add_all(
+        ScrapeResult(run_id=run_id, platform=platform, worker_id=worker_id, data=json.dumps(rows))
+        for platform, rows in by_platform.items()
+    )
+    db.commit()
+    return True
+
+
+def fail_tasks(db: Session, task_ids, worker_id, error):
+    """Put a failed batch back in the queue, or give up on tasks out of attempts."""
+    for task in db.query(ScrapeTask).filter(
+        ScrapeTask.id.in_(task_ids),
+        ScrapeTask.claimed_by == worker_id,
+        ScrapeTask.status == "claimed",
+    ):
+        task.status = "pending" if task.attempts < TASK_MAX_ATTEMPTS else "failed"
+        task.error = str(error)[:500]
+        task.finished_at = datetime.utcnow() if task.status == "failed" else None
+    db.query(ScrapeTaskLock).filter(ScrapeTaskLock.task_id.in_(task_ids)).delete(synchronize_session=False)
+    db.commit()
+
+
+def process_batch(worker_id, limit=TASK_BATCH_SIZE):
+    """Claim and scrape one batch. Returns the number of tasks processed."""
+    from scrapers.aggregator import fetch_platform_urls
+
+    # Claim, then release the connection: scraping takes minutes and idle
+    # pooled connections are what the hosted Postgres drops
+    db = WriteSession()
+    try:
+        groups = defaultdict(list)
+        for task in claim_tasks(db, worker_id, limit):
+            groups[(task.run_id, task.platform)].append((task.id, task.url))
+    finally:
+        db.close()
+
+    for (run_id, platform), group in groups.items():
+        task_ids = [task_id for task_id, _ in group]
+        print(f"🛠️ {worker_id}: scraping {len(group)} {platform} URLs for run {run_id}")
+        try:
+            hackathons, failed_urls = fetch_platform_urls(platform, [url for _, url in group])
+        except Exception as e:
+            print(f"❌ {worker_id}: {platform} batch failed: {e}")
+            with_db_retry(lambda db: fail_tasks(db, task_ids, worker_id, e))
+            continue
+
+        # URLs that didn't load (timeouts, open circuit) are retried, not marked done
+        failed_urls = set(failed_urls)
+        failed_ids = [task_id for task_id, url in group if url in failed_urls]
+        done_ids = [task_id for task_id, url in group if url not in failed_urls]
+        if failed_ids:
+            with_db_retry(lambda db: fail_tasks(db, failed_ids, worker_id, "page failed to load"))
+        if done_ids:
+            with_db_retry(lambda db: complete_tasks(db, run_id, done_ids, worker_id, hackathons))
+    return sum(len(group) for group in groups.values())
+
+
+# ---------- MERGE ---------- #
+
+def _merge_run(run_id):
+    db = WriteSession()
+    try:
+        raw, seen = [], set()
+        rows = db.query(ScrapeResult.data).filter(ScrapeResult.run_id == run_id).order_by(ScrapeResult.id)
+        for (data,) in rows:
+            for h in json.loads(data):
+                # Same first-wins dedup the single-process fetchers apply
+                key = (h["platform"], h["link"])
+                if key not in seen:
+                    seen.add(key)
+                    raw.append(h)
+    finally:
+        db.close()
+
+    hackathons, _ = normalize_hackathons(raw)
+    result = with_db_retry(lambda db: upsert_hackathons(db, hackathons))
+
+    db = WriteSession()
+    try:
+        task_ids = db.query(ScrapeTask.id).filter(ScrapeTask.run_id == run_id)
+        db.query(ScrapeTaskLock).filter(ScrapeTaskLock.task_id.in_(task_ids)).delete(synchronize_session=False)
+        db.query(ScrapeResult).filter(ScrapeResult.run_id == run_id).delete(synchronize_session=False)
+        db.query(ScrapeTask).filter(ScrapeTask.run_id == run_id).delete(synchronize_session=False)
+        db.query(ScrapeRun).filter(ScrapeRun.run_id == run_id).update(
+            {"status": "merged", "merged_at": datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+    return result
+
+
+def merge_ready_runs():
+    """
+    Merge every run whose tasks are all finished. The queued -> merging
+    update only succeeds for one worker, so each run is upserted once.
+    """
+    # A merge still "merging" after a lease period belongs to a dead worker
+    mergeable = or_(
+        ScrapeRun.status == "queued",
+        (ScrapeRun.status == "merging")
+        & (ScrapeRun.merge_started_at < datetime.utcnow() - timedelta(seconds=TASK_LEASE_SECONDS)),
+    )
+    db = WriteSession()
+    try:
+        open_runs = db.query(ScrapeTask.run_id).filter(ScrapeTask.status.in_(OPEN_STATUSES))
+        ready = [
+            run_id for (run_id,) in db.query(ScrapeRun.run_id).filter(
+                mergeable,
+                ScrapeRun.run_id.notin_(open_runs),
+            )
+        ]
+        claimed = []
+        for run_id in ready:
+            won = db.query(ScrapeRun).filter(ScrapeRun.run_id == run_id, mergeable).update(
+                {"status": "merging", "merge_started_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.commit()
+            if won:
+                claimed.append(run_id)
+    finally:
+        db.close()
+
+    results = {}
+    for run_id in claimed:
+        print(f"🔀 Merging scrape run {run_id}...")
+        try:
+            result = _merge_run(run_id)
+        except Exception as e:
+            print(f"❌ Merge of run {run_id} failed: {e}")
+            _set_run_status(run_id, "queued")  # let the next worker retry it
+            continue
+        print(f"✅ Run {run_id} merged: {result['inserted']} inserted, {result['updated']} updated")
+        refresh_changed_images(result)
+        results[run_id] = result
+    return results
+
+
+def _set_run_status(run_id, status):
+    db = WriteSession()
+    try:
+        db.query(ScrapeRun).filter(ScrapeRun.run_id == run_id).update(
+            {"status": status}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+# ---------- WORKER LOOP / STATUS ---------- #
+
+def run_worker(worker_id=None, batch_size=TASK_BATCH_SIZE, exit_when_idle=False):
+    """Claim, scrape and merge until stopped (or until the queue is empty)."""
+    worker_id = worker_id or default_worker_id()
+    print(f"👷 Scrape worker {worker_id} started (batch size {batch_size})")
+    while True:
+        processed = process_batch(worker_id, batch_size)
+        merge_ready_runs()
+        if processed:
+            continue
+        if exit_when_idle:
+            print(f"👋 Worker {worker_id}: queue is empty, exiting")
+            return
+        time.sleep(WORKER_POLL_SECONDS)
+
+
+def queue_status(db: Session):
+    """Task counts per run and status, for the /scrape-queue endpoint."""
+    runs = {
+        run.run_id: {
+            "platforms": run.platforms.split(","),
+            "status": run.status,
+            "created_at": run.created_at,
+            "tasks": {},
+        }
+        for run in db.query(ScrapeRun).filter(ScrapeRun.status != "merged").order_by(ScrapeRun.created_at)
+    }
+    counts = db.query(ScrapeTask.run_id, ScrapeTask.status, func.count()).group_by(
+        ScrapeTask.run_id, ScrapeTask.status
+    )
+    for run_id, status, count in counts:
+        if run_id in runs:
+            runs[run_id]["tasks"][status] = count
+    return {"runs": runs}
@@ -0,0 +1,85 @@
+"""
+Measure API cold-start cost: import time, app startup time and peak RSS.
+
+Each run happens in a fresh interpreter so imports are never cached.
+
+    python measure_startup.py                 # lazy/read-only mode
+    python measure_startup.py --eager         # also import the scrapers (old behaviour)
+    python measure_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import json, resource, sys, time
+
+t0 = time.perf_counter()
+import app.main
+if EAGER:
+    import scrapers.aggregator
+t1 = time.perf_counter()
+
+from fastapi.testclient import TestClient
+with TestClient(app.main.app):
+    t2 = time.perf_counter()
+
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+
+print(json.dumps({
+    "import_s": t1 - t0,
+    "startup_s": t2 - t1,
+    "max_rss_mb": rss_kb / 1024,
+    "playwright_loaded": "playwright.sync_api" in sys.modules,
+    "scrapers_loaded": "scrapers.aggregator" in sys.modules,
+    "modules_loaded": len(sys.modules),
+}))
+"""
+
+
+def run_probe(eager, env):
+    code = PROBE.replace("EAGER", repr(eager))
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    # The probe's JSON is the last line; anything before it is app logging
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--eager", action="store_true", help="import scrapers/Playwright at startup")
+    parser.add_argument(
+        "--background-tasks",
+        action="store_true",
+        help="keep scheduler/self-ping/schema creation on (off by default for the measurement)",
+    )
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if not args.background_tasks:
+        env.update(AUTO_CREATE_SCHEMA="0", ENABLE_SCHEDULER="0", ENABLE_SELF_PING="0")
+
+    results = [run_probe(args.eager, env) for _ in range(args.runs)]
+
+    print(f"📏 {args.runs} runs, mode={'eager' if args.eager else 'lazy'}")
+    for key in ("import_s", "startup_s", "max_rss_mb"):
+        values = [r[key] for r in results]
+        print(f"  {key:<12} median={statistics.median(values):.3f}  min={min(values):.3f}  max={max(values):.3f}")
+    last = results[-1]
+    print(f"  modules={last['modules_loaded']}  scrapers={last['scrapers_loaded']}  playwright={last['playwright_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
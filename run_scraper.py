@@ -1,14 +1,63 @@
-from app.database import SessionLocal
-from scrapers.aggregator import fetch_all_hackathons
+import argparse
+import time
+
+from app.database import WriteSession
 from app.crud import upsert_hackathons
+from app.normalize import normalize_hackathons
+from app.scheduler import scrape_and_update_db
 
 def run_once():
     print("🚀 Starting one-time hackathon scraping...")
-    db = SessionLocal()
-    data = fetch_all_hackathons()
-    added = upsert_hackathons(db, data)
-    db.close()
-    print(f"✅ Done. Added {added} new hackathons.")
+    result = scrape_and_update_db()
+    print(f"✅ Done. {result['inserted']} new, {result['updated']} updated of {result['total']} hackathons.")
+
+def record_once(path):
+    """Live scrape that also saves every parsed page/API payload to `path`."""
+    from scrapers.snapshots import recording
+
+    with recording(path):
+        run_once()
+
+def replay_once(path, platforms=None, repeat=1, dry_run=False):
+    """
+    Feed a recorded archive through parsing, normalization and upsert with no
+    browser and no network, printing how long each stage takes.
+    """
+    from scrapers.snapshots import replay
+
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        raw = replay(path, platforms)
+        t1 = time.perf_counter()
+        data, _ = normalize_hackathons(raw)
+        t2 = time.perf_counter()
+        timings = f"parse {t1 - t0:.3f}s, normalize {t2 - t1:.3f}s"
+        if not dry_run:
+            db = WriteSession()
+            try:
+                upsert_hackathons(db, data)
+            finally:
+                db.close()
+            timings += f", upsert {time.perf_counter() - t2:.3f}s"
+        print(f"⏱️ Replay {i + 1}/{repeat}: {len(data)} hackathons - {timings}")
 
 if __name__ == "__main__":
-    run_once()
+    parser = argparse.ArgumentParser(description="One-time hackathon scrape")
+    parser.add_argument("--record", metavar="ARCHIVE", help="scrape live and save raw pages to ARCHIVE (.jsonl.gz)")
+    parser.add_argument("--replay", metavar="ARCHIVE", help="parse and upsert a recorded ARCHIVE, no network")
+    parser.add_argument("--platform", action="append", help="replay only this platform (repeatable)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay N times (benchmarking)")
+    parser.add_argument("--dry-run", action="store_true", help="replay without writing to the database")
+    parser.add_argument("--backfill-images", action="store_true", help="fetch thumbnails for stored rows that have none")
+    args = parser.parse_args()
+
+    if args.backfill_images:
+        from app.images import backfill_images
+
+        backfill_images()
+    elif args.replay:
+        replay_once(args.replay, args.platform, args.repeat, args.dry_run)
+    elif args.record:
+        record_once(args.record)
+    else:
+        run_once()
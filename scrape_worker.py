@@ -0,0 +1,35 @@
+import argparse
+
+from app.database import WriteSession
+from app.work_queue import TASK_BATCH_SIZE, enqueue_scrape_run, merge_ready_runs, run_worker
+
+
+def enqueue(platforms=None):
+    db = WriteSession()
+    try:
+        return enqueue_scrape_run(db, platforms)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed scrape worker")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue", help="queue every URL of the given platforms as tasks")
+    p_enqueue.add_argument("--platform", action="append", help="only this platform (repeatable)")
+
+    p_work = sub.add_parser("work", help="claim and scrape tasks, merging finished runs")
+    p_work.add_argument("--worker-id", help="name shown in claims (default: host-pid)")
+    p_work.add_argument("--batch-size", type=int, default=TASK_BATCH_SIZE, help="tasks claimed at a time")
+    p_work.add_argument("--exit-when-idle", action="store_true", help="stop once the queue is empty")
+
+    sub.add_parser("merge", help="merge runs whose tasks are all finished")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        enqueue(args.platform)
+    elif args.command == "work":
+        run_worker(args.worker_id, args.batch_size, args.exit_when_idle)
+    else:
+        merge_ready_runs()
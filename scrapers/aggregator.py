@@ -1,33 +1,52 @@
-from .devpost import fetch_hackathons as fetch_devpost_hackathons
-from .unstop import fetch_unstop_hackathons
-from .mlh import fetch_mlh_hackathons
+from .devpost import BASE_URLS as DEVPOST_URLS, fetch_hackathons as fetch_devpost_hackathons
+from .unstop import FILTER_URLS as UNSTOP_URLS, fetch_unstop_hackathons
+from .mlh import MLH_URL, fetch_mlh_hackathons
+from app.profiling import span
+
+# Platform name -> fetcher. Each platform can be scraped on its own schedule.
+PLATFORM_FETCHERS = {
+    "Devpost": fetch_devpost_hackathons,
+    "Unstop": fetch_unstop_hackathons,
+    "MLH": fetch_mlh_hackathons,
+}
+
+# Platform name -> URLs its fetcher walks; each one is a unit of distributed work
+PLATFORM_URLS = {
+    "Devpost": DEVPOST_URLS,
+    "Unstop": UNSTOP_URLS,
+    "MLH": [MLH_URL],
+}
+
+
+def fetch_platform_urls(platform, urls=None):
+    """
+    Fetch hackathons from a single platform (optionally only some of its
+    URLs). Returns (hackathons, failed_urls); URLs that could not be loaded
+    are reported rather than raised so callers can retry just those.
+    """
+    print(f"🌐 Fetching hackathons from {platform}...")
+    with span(platform):
+        hacks, failed = PLATFORM_FETCHERS[platform](urls)
+    print(f"✅ {platform}: {len(hacks)} hackathons fetched, {len(failed)} URLs failed")
+    return hacks, failed
+
+
+def fetch_platform_hackathons(platform):
+    """
+    Fetch hackathons from a single platform. Errors are raised to the caller
+    so the scheduler can back off on failing sources.
+    """
+    return fetch_platform_urls(platform)[0]
+
 
 def fetch_all_hackathons():
     all_hackathons = []
 
-    print("🌐 Fetching hackathons from Devpost...")
-    try:
-        devpost_hacks = fetch_devpost_hackathons()
-        all_hackathons.extend(devpost_hacks)
-        print(f"✅ Devpost: {len(devpost_hacks)} hackathons fetched")
-    except Exception as e:
-        print(f"❌ Devpost fetch failed: {e}")
-
-    print("🌐 Fetching hackathons from Unstop...")
-    try:
-        unstop_hacks = fetch_unstop_hackathons()
-        all_hackathons.extend(unstop_hacks)
-        print(f"✅ Unstop: {len(unstop_hacks)} hackathons fetched")
-    except Exception as e:
-        print(f"❌ Unstop fetch failed: {e}")
-
-    print("🌐 Fetching hackathons from MLH...")
-    try:
-        mlh_hacks = fetch_mlh_hackathons()
-        all_hackathons.extend(mlh_hacks)
-        print(f"✅ MLH: {len(mlh_hacks)} hackathons fetched")
-    except Exception as e:
-        print(f"❌ MLH fetch failed: {e}")
+    for platform in PLATFORM_FETCHERS:
+        try:
+            all_hackathons.extend(fetch_platform_hackathons(platform))
+        except Exception as e:
+            print(f"❌ {platform} fetch failed: {e}")
 
     print(f"🌟 Total hackathons fetched: {len(all_hackathons)}")
     return all_hackathons
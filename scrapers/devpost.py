@@ -2,6 +2,10 @@ from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 import time
 
+from .resilience import CircuitOpenError, RetryBudget, guarded_goto
+from .snapshots import record
+from app.profiling import span
+
 BASE_URLS = [
     # Main page
     "https://devpost.com/hackathons",
@@ -29,21 +33,71 @@ BASE_URLS = [
     "https://devpost.com/hackathons?search=education",
 ]
 
-def fetch_hackathons():
+def parse_devpost_listing(html, url=None):
+    """Extract hackathon cards from a rendered Devpost listing page."""
+    soup = BeautifulSoup(html, "html.parser")
+    hackathons = []
+
+    # REAL selector
+    for card in soup.select("a[href*='.devpost.com']:has(h3)"):
+        name_el = card.select_one("h3")
+        if not name_el:
+            continue
+
+        link = card.get("href")
+        if not link.startswith("http"):
+            link = "https://devpost.com" + link
+
+        # Try to extract image URL from the card
+        image_url = None
+        img_el = card.select_one("img")
+        if img_el:
+            image_url = img_el.get("src") or img_el.get("data-src") or img_el.get("data-srcset")
+            if image_url and not image_url.startswith("http"):
+                image_url = "https://devpost.com" + image_url
+
+        hackathons.append({
+            "name": name_el.text.strip(),
+            "platform": "Devpost",
+            "link": link,
+            "location": "Online",
+            "image_url": image_url,
+        })
+    return hackathons
+
+
+def fetch_hackathons(urls=None):
+    """
+    Scrape `urls` (default: all BASE_URLS) in one browser session.
+    Returns (hackathons, failed_urls).
+    """
+    urls = urls or BASE_URLS
     hackathons = {}
+    failed = []
+    budget = RetryBudget()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0",
-            viewport={"width": 1400, "height": 900}
-        )
-        page = context.new_page()
-
-        for url in BASE_URLS:
+        with span("browser_launch"):
+            browser = p.chromium.launch(headless=True)
+            context = browser.new_context(
+                user_agent="Mozilla/5.0",
+                viewport={"width": 1400, "height": 900}
+            )
+            page = context.new_page()
+
+        for i, url in enumerate(urls):
             print(f"\n🔍 Scraping Devpost: {url}")
 
-            page.goto(url, wait_until="networkidle", timeout=60000)
+            try:
+                guarded_goto(page, url, budget=budget, wait_until="networkidle", timeout=60000)
+            except CircuitOpenError as e:
+                print(f"⛔ Skipping remaining Devpost URLs: {e}")
+                failed.extend(urls[i:])
+                break
+            except Exception as e:
+                print(f"❌ Failed to load {url}: {e}")
+                failed.append(url)
+                continue
 
             # Accept cookies if present
             try:
@@ -54,65 +108,43 @@ def fetch_hackathons():
             prev_count = 0
 
             # Infinite scroll
-            for _ in range(10):
-                page.mouse.wheel(0, 4000)
-                time.sleep(2)
+            with span("scroll_wait"):
+                for _ in range(10):
+                    page.mouse.wheel(0, 4000)
+                    time.sleep(2)
 
-                soup = BeautifulSoup(page.content(), "html.parser")
-                cards = soup.select("a[href*='.devpost.com']")
+                    soup = BeautifulSoup(page.content(), "html.parser")
+                    cards = soup.select("a[href*='.devpost.com']")
 
-                if len(cards) == prev_count:
-                    break
-                prev_count = len(cards)
+                    if len(cards) == prev_count:
+                        break
+                    prev_count = len(cards)
 
-            soup = BeautifulSoup(page.content(), "html.parser")
-
-            # REAL selector
-            cards = soup.select("a[href*='.devpost.com']:has(h3)")
+            html = page.content()
+            record("Devpost", url, "html", html)
+            with span("parse"):
+                cards = parse_devpost_listing(html, url)
 
             print(f"➡️ Found {len(cards)} cards")
 
-            for card in cards:
-                name_el = card.select_one("h3")
-                if not name_el:
+            for h in cards:
+                if h["link"] in hackathons:
                     continue
-
-                link = card.get("href")
-                if not link.startswith("http"):
-                    link = "https://devpost.com" + link
-
-                if link in hackathons:
-                    continue
-
-                # Try to extract image URL from the card
-                image_url = None
-                img_el = card.select_one("img")
-                if img_el:
-                    image_url = img_el.get("src") or img_el.get("data-src") or img_el.get("data-srcset")
-                    if image_url and not image_url.startswith("http"):
-                        image_url = "https://devpost.com" + image_url
-
-                hackathons[link] = {
-                    "name": name_el.text.strip(),
-                    "platform": "Devpost",
-                    "link": link,
-                    "location": "Online",
-                    "image_url": image_url,
-                }
+                hackathons[h["link"]] = h
 
                 print(
-                    f"Name: {name_el.text.strip()}\n"
+                    f"Name: {h['name']}\n"
                     f"Platform: Devpost\n"
                     f"Location: Online\n"
-                    f"Image: {image_url}\n"
-                    f"Link: {link}\n"
+                    f"Image: {h['image_url']}\n"
+                    f"Link: {h['link']}\n"
                     f"{'-'*40}"
                 )
 
         browser.close()
 
     print(f"\n✅ Devpost unique hackathons scraped: {len(hackathons)}")
-    return list(hackathons.values())
+    return list(hackathons.values()), failed
 
 
 if __name__ == "__main__":
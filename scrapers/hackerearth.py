@@ -1,6 +1,8 @@
 from playwright.sync_api import sync_playwright
 import time
 
+from .resilience import guarded_goto
+
 HACKEREARTH_URL = "https://www.hackerearth.com/challenges/"
 
 def fetch_hackerearth_hackathons():
@@ -9,7 +11,7 @@ def fetch_hackerearth_hackathons():
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
-        page.goto(HACKEREARTH_URL, timeout=60000)
+        guarded_goto(page, HACKEREARTH_URL, attempts=3, timeout=60000)
 
         # Wait for the challenge cards to load
         page.wait_for_selector("div.challenge-card", timeout=15000)
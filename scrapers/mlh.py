@@ -2,19 +2,121 @@ from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 import json
 import time
-import random
+
+from .resilience import CircuitOpenError, RetryBudget, guarded_goto, retry_call
+from .snapshots import record
+from app.profiling import span
 
 MLH_URL = "https://mlh.io/seasons/2026/events"
 
 
-def fetch_mlh_hackathons():
-    hackathons = {}
-    max_retries = 3
+def parse_mlh_api_payload(data):
+    """Extract events from a captured JSON API response."""
+    hackathons = []
     
-    for attempt in range(max_retries):
-        print(f"\n🔄 Attempt {attempt + 1}/{max_retries}...")
-        
-        with sync_playwright() as p:
+    # Check if it contains events/hackathons
+    if isinstance(data, dict):
+        for key in data:
+            if 'event' in key.lower() or 'hackathon' in key.lower():
+                print(f"Found potential data in key: {key}")
+                events = data[key]
+                if isinstance(events, list) and len(events) > 0:
+                    print(f"Found {len(events)} events!")
+                    for event in events:
+                        if isinstance(event, dict):
+                            name = event.get('name', event.get('title', 'Unknown'))
+                            link = event.get('link', event.get('url', event.get('website', '')))
+                            date = event.get('date', event.get('start_date', event.get('startDate', 'TBD')))
+                            location = event.get('location', event.get('city', 'TBD'))
+                            image = event.get('image', event.get('logo', event.get('banner', None)))
+                            
+                            if link and not link.startswith('http'):
+                                link = 'https://mlh.io' + link
+                            if image and not image.startswith('http'):
+                                image = 'https:' + image
+                            
+                            if link:
+                                hackathons.append({
+                                    "name": name,
+                                    "platform": "MLH",
+                                    "location": location,
+                                    "date": date,
+                                    "link": link,
+                                    "image_url": image,
+                                })
+    
+    elif isinstance(data, list):
+        print(f"Found list with {len(data)} items")
+        for item in data[:5]:
+            print(f"  Item: {str(item)[:200]}")
+    
+    return hackathons
+
+
+def parse_mlh_event_links(html):
+    """Links to individual event pages on the events listing."""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Look for all links that might be event pages
+    event_links = []
+    for link in soup.find_all('a', href=True):
+        href = link.get('href', '')
+        if '/events/' in href and href not in event_links:
+            full_link = href if href.startswith('http') else 'https://mlh.io' + href
+            event_links.append(full_link)
+    return event_links
+
+
+def parse_mlh_event_page(html, link):
+    """Extract one event from its own page."""
+    event_soup = BeautifulSoup(html, 'html.parser')
+    
+    # Extract event details
+    title_el = event_soup.find('h1')
+    title = title_el.get_text(strip=True) if title_el else "Unknown"
+    
+    # Look for date
+    date = "TBD"
+    for pattern in ['[class*="date"]', '[class*="time"]', 'time']:
+        el = event_soup.select_one(pattern)
+        if el:
+            date = el.get_text(strip=True)
+            break
+    
+    # Look for location
+    location = "TBD"
+    for pattern in ['[class*="location"]', '[class*="city"]', '[class*="venue"]']:
+        el = event_soup.select_one(pattern)
+        if el:
+            location = el.get_text(strip=True)
+            break
+    
+    # Look for image
+    image_url = None
+    img_el = event_soup.find('img')
+    if img_el:
+        image_url = img_el.get('src') or img_el.get('data-src')
+        if image_url and not image_url.startswith('http'):
+            image_url = 'https:' + image_url
+    
+    return {
+        "name": title,
+        "platform": "MLH",
+        "location": location,
+        "date": date,
+        "link": link,
+        "image_url": image_url,
+    }
+
+
+def _scrape_mlh(hackathons, budget):
+    """
+    One attempt: launch a browser and collect events into `hackathons`.
+    Returns the event pages that failed or were skipped.
+    """
+    failed = []
+    with sync_playwright() as p:
+        with span("browser_launch"):
             browser = p.chromium.launch(
                 headless=True,
                 args=[
@@ -25,51 +127,54 @@ def fetch_mlh_hackathons():
                     "--window-size=1920,1080",
                 ]
             )
-            
-            context = browser.new_context(
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                viewport={"width": 1920, "height": 1080},
-                locale="en-US",
-            )
-            
-            page = context.new_page()
-            
-            # Store captured API responses
-            api_data = []
-            
-            # Capture all API responses
-            def handle_response(response):
-                url = response.url
-                if 'api' in url.lower() or 'events' in url.lower() or 'json' in url.lower():
-                    try:
-                        content_type = response.headers.get('content-type', '')
-                        if 'application/json' in content_type or url.endswith('.json'):
-                            data = response.json()
-                            api_data.append({'url': url, 'data': data})
-                            print(f"📡 Captured API response: {url}")
-                    except:
-                        pass
-            
-            page.on('response', handle_response)
-            
-            page.set_extra_http_headers({
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-            })
-            
-            try:
-                print(f"Navigating to {MLH_URL}...")
+        
+        context = browser.new_context(
+            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            viewport={"width": 1920, "height": 1080},
+            locale="en-US",
+        )
+        
+        page = context.new_page()
+        
+        # Store captured API responses
+        api_data = []
+        
+        # Capture all API responses
+        def handle_response(response):
+            url = response.url
+            if 'api' in url.lower() or 'events' in url.lower() or 'json' in url.lower():
+                try:
+                    content_type = response.headers.get('content-type', '')
+                    if 'application/json' in content_type or url.endswith('.json'):
+                        data = response.json()
+                        record("MLH", url, "json", data)
+                        api_data.append({'url': url, 'data': data})
+                        print(f"📡 Captured API response: {url}")
+                except:
+                    pass
+        
+        page.on('response', handle_response)
+        
+        page.set_extra_http_headers({
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Connection": "keep-alive",
+            "Upgrade-Insecure-Requests": "1",
+        })
+        
+        try:
+            print(f"Navigating to {MLH_URL}...")
+            with span("navigation"):
                 page.goto(
                     MLH_URL, 
                     timeout=60000, 
                     wait_until="domcontentloaded"
                 )
-                
-                # Wait for network to be idle (all API calls complete)
-                print("Waiting for network to settle...")
+            
+            # Wait for network to be idle (all API calls complete)
+            print("Waiting for network to settle...")
+            with span("scroll_wait"):
                 try:
                     page.wait_for_load_state("networkidle", timeout=30000)
                 except:
@@ -77,146 +182,95 @@ def fetch_mlh_hackathons():
                 
                 # Additional wait for JavaScript rendering
                 time.sleep(3)
+            
+            # Check page title
+            title = page.title()
+            print(f"Page title: {title}")
+            
+            # Check if we captured any API data
+            print(f"\n📡 Captured {len(api_data)} API responses")
+            
+            # Try to extract hackathon data from API responses
+            for api_response in api_data:
+                try:
+                    with span("parse"):
+                        events = parse_mlh_api_payload(api_response['data'])
+                    for h in events:
+                        hackathons[h["link"]] = h
+                        print(f"Name: {h['name']}\nDate: {h['date']}\nLink: {h['link']}\n{'-'*40}")
+                except Exception as e:
+                    print(f"Error parsing API response: {e}")
+                    continue
+            
+            # If no data from API, try to find event links on the page
+            if not hackathons:
+                print("\nNo API data found, looking for event links on page...")
+                html = page.content()
+                record("MLH", MLH_URL, "html", html)
+                event_links = parse_mlh_event_links(html)
                 
-                # Check page title
-                title = page.title()
-                print(f"Page title: {title}")
-                
-                # Check if we captured any API data
-                print(f"\n📡 Captured {len(api_data)} API responses")
+                print(f"Found {len(event_links)} event links")
                 
-                # Try to extract hackathon data from API responses
-                for api_response in api_data:
+                # Visit each event page
+                event_links = event_links[:10]  # Limit to 10
+                for i, link in enumerate(event_links):
                     try:
-                        data = api_response['data']
+                        print(f"\nVisiting: {link}")
+                        guarded_goto(
+                            page, link, budget=budget, attempts=1,
+                            timeout=30000, wait_until="domcontentloaded",
+                        )
+                        with span("scroll_wait"):
+                            time.sleep(2)
                         
-                        # Check if it contains events/hackathons
-                        if isinstance(data, dict):
-                            for key in data:
-                                if 'event' in key.lower() or 'hackathon' in key.lower():
-                                    print(f"Found potential data in key: {key}")
-                                    events = data[key]
-                                    if isinstance(events, list) and len(events) > 0:
-                                        print(f"Found {len(events)} events!")
-                                        for event in events:
-                                            if isinstance(event, dict):
-                                                name = event.get('name', event.get('title', 'Unknown'))
-                                                link = event.get('link', event.get('url', event.get('website', '')))
-                                                date = event.get('date', event.get('start_date', event.get('startDate', 'TBD')))
-                                                location = event.get('location', event.get('city', 'TBD'))
-                                                image = event.get('image', event.get('logo', event.get('banner', None)))
-                                                
-                                                if link and not link.startswith('http'):
-                                                    link = 'https://mlh.io' + link
-                                                if image and not image.startswith('http'):
-                                                    image = 'https:' + image
-                                                
-                                                if link:
-                                                    hackathons[link] = {
-                                                        "name": name,
-                                                        "platform": "MLH",
-                                                        "location": location,
-                                                        "date": date,
-                                                        "link": link,
-                                                        "image_url": image,
-                                                    }
-                                                    
-                                                    print(f"Name: {name}\nDate: {date}\nLink: {link}\n{'-'*40}")
+                        event_html = page.content()
+                        record("MLH", link, "html", event_html)
+                        with span("parse"):
+                            h = parse_mlh_event_page(event_html, link)
+                        hackathons[link] = h
                         
-                        elif isinstance(data, list):
-                            print(f"Found list with {len(data)} items")
-                            for item in data[:5]:
-                                print(f"  Item: {str(item)[:200]}")
-                    
+                        print(f"Name: {h['name']}\nLocation: {h['location']}\nDate: {h['date']}\nLink: {link}\n{'-'*40}")
+                        
+                    except CircuitOpenError as e:
+                        print(f"⛔ Skipping remaining MLH event pages: {e}")
+                        failed.extend(event_links[i:])
+                        break
                     except Exception as e:
-                        print(f"Error parsing API response: {e}")
+                        print(f"Error visiting {link}: {e}")
+                        failed.append(link)
                         continue
-                
-                # If no data from API, try to find event links on the page
-                if not hackathons:
-                    print("\nNo API data found, looking for event links on page...")
-                    html = page.content()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Look for all links that might be event pages
-                    all_links = soup.find_all('a', href=True)
-                    event_links = []
-                    
-                    for link in all_links:
-                        href = link.get('href', '')
-                        if '/events/' in href and href not in event_links:
-                            full_link = href if href.startswith('http') else 'https://mlh.io' + href
-                            event_links.append(full_link)
-                    
-                    print(f"Found {len(event_links)} event links")
-                    
-                    # Visit each event page
-                    for link in event_links[:10]:  # Limit to 10
-                        try:
-                            print(f"\nVisiting: {link}")
-                            page.goto(link, timeout=30000, wait_until="domcontentloaded")
-                            time.sleep(2)
-                            
-                            event_html = page.content()
-                            event_soup = BeautifulSoup(event_html, 'html.parser')
-                            
-                            # Extract event details
-                            title_el = event_soup.find('h1')
-                            title = title_el.get_text(strip=True) if title_el else "Unknown"
-                            
-                            # Look for date
-                            date = "TBD"
-                            for pattern in ['[class*="date"]', '[class*="time"]', 'time']:
-                                el = event_soup.select_one(pattern)
-                                if el:
-                                    date = el.get_text(strip=True)
-                                    break
-                            
-                            # Look for location
-                            location = "TBD"
-                            for pattern in ['[class*="location"]', '[class*="city"]', '[class*="venue"]']:
-                                el = event_soup.select_one(pattern)
-                                if el:
-                                    location = el.get_text(strip=True)
-                                    break
-                            
-                            # Look for image
-                            image_url = None
-                            img_el = event_soup.find('img')
-                            if img_el:
-                                image_url = img_el.get('src') or img_el.get('data-src')
-                                if image_url and not image_url.startswith('http'):
-                                    image_url = 'https:' + image_url
-                            
-                            hackathons[link] = {
-                                "name": title,
-                                "platform": "MLH",
-                                "location": location,
-                                "date": date,
-                                "link": link,
-                                "image_url": image_url,
-                            }
-                            
-                            print(f"Name: {title}\nLocation: {location}\nDate: {date}\nLink: {link}\n{'-'*40}")
-                            
-                        except Exception as e:
-                            print(f"Error visiting {link}: {e}")
-                            continue
-                
-                browser.close()
-                break
-                
-            except Exception as e:
-                print(f"⚠️ Error on attempt {attempt + 1}: {e}")
-                browser.close()
-                if attempt < max_retries - 1:
-                    wait_time = random.uniform(5, 10)
-                    print(f"Retrying in {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
-                continue
+            
+        finally:
+            browser.close()
+    return failed
+
+
+def fetch_mlh_hackathons(urls=None):
+    """
+    MLH is a single events page, so `urls` is accepted only for a uniform
+    signature. Returns (hackathons, failed_urls).
+    """
+    hackathons = {}
+    failed = []
+    budget = RetryBudget()
+
+    # No breaker here: the event pages already go through the mlh.io breaker
+    # in guarded_goto, and a successful outer attempt would reset it
+    try:
+        failed = retry_call(
+            _scrape_mlh,
+            hackathons,
+            budget,
+            attempts=3,
+            base_delay=5.0,
+            max_delay=30.0,
+        )
+    except Exception as e:
+        print(f"❌ MLH scrape failed: {e}")
+        failed.append(MLH_URL)
 
     print(f"\n✅ TOTAL MLH hackathons scraped: {len(hackathons)}")
-    return list(hackathons.values())
+    return list(hackathons.values()), failed
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+"""
+Shared retry / circuit-breaker helpers for scrapers and DB writes.
+
+- CircuitBreaker: per host. After `failure_threshold` consecutive failures the
+  host is "open" and every call fails immediately with CircuitOpenError until
+  `reset_timeout` has passed; then one trial call is let through.
+- retry_call: exponential backoff with full jitter, optionally limited by a
+  RetryBudget shared across a whole scrape run.
+- guarded_goto: page.goto() behind the host's breaker, with a shorter
+  timeout once the host has started failing.
+"""
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from app.profiling import span
+
+FAILURE_THRESHOLD = int(os.getenv("SCRAPE_BREAKER_THRESHOLD", "2"))
+RESET_TIMEOUT_SECONDS = float(os.getenv("SCRAPE_BREAKER_RESET_SECONDS", "300"))
+# Retries a single scrape run may spend across all of its URLs
+RETRY_BUDGET = int(os.getenv("SCRAPE_RETRY_BUDGET", "10"))
+# Navigation timeout used once a host has failed at least once
+DEGRADED_TIMEOUT_MS = int(os.getenv("SCRAPE_DEGRADED_TIMEOUT_MS", "15000"))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        if self.state == "open":
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(f"{self.name} circuit open, retry in {remaining:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # A failed half-open trial re-opens straight away
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                if self.state != "open":
+                    print(f"🔌 Circuit for {self.name} opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+    def timeout_ms(self, default_ms):
+        """Full timeout for healthy hosts, a short one for hosts already failing."""
+        return default_ms if self.failures == 0 else min(default_ms, DEGRADED_TIMEOUT_MS)
+
+
+class RetryBudget:
+    """A pool of retries shared by every call in one scrape run."""
+
+    def __init__(self, retries=RETRY_BUDGET):
+        self.remaining = retries
+        self._lock = threading.Lock()
+
+    def spend(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(url_or_name):
+    """The shared breaker for a URL's host (or any other name, e.g. "database")."""
+    name = urlparse(url_or_name).netloc or url_or_name
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states():
+    """State and consecutive failures of every breaker, served by /throttle-stats."""
+    with _breakers_lock:
+        breakers = sorted(_breakers.items())
+    return {name: {"state": b.state, "failures": b.failures} for name, b in breakers}
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Exponential backoff with full jitter for the given (0-based) retry."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def retry_call(
+    fn,
+    *args,
+    attempts=3,
+    base_delay=1.0,
+    max_delay=30.0,
+    retry_on=(Exception,),
+    budget=None,
+    breaker=None,
+    **kwargs,
+):
+    """
+    Call fn(*args, **kwargs), retrying on `retry_on` errors. Stops early when
+    the breaker opens or the budget runs out, re-raising the last error.
+    """
+    for attempt in range(attempts):
+        if breaker:
+            breaker.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except retry_on as e:
+            if breaker:
+                breaker.record_failure()
+            last_attempt = attempt == attempts - 1
+            if last_attempt or (budget is not None and not budget.spend()):
+                raise
+            if breaker and breaker.state == "open":
+                raise CircuitOpenError(f"{breaker.name} circuit open after: {e}") from e
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            print(f"⚠️ Attempt {attempt + 1}/{attempts} failed: {e}. Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+        else:
+            if breaker:
+                breaker.record_success()
+            return result
+
+
+def guarded_goto(page, url, budget=None, attempts=2, timeout=60000, **goto_kwargs):
+    """
+    page.goto() with per-host circuit breaking and retries. Raises
+    CircuitOpenError as soon as the host is known to be down, so callers can
+    skip the rest of that host's URLs.
+    """
+    breaker = breaker_for(url)
+    with span("navigation"):
+        return retry_call(
+            lambda: page.goto(url, timeout=breaker.timeout_ms(timeout), **goto_kwargs),
+            attempts=attempts,
+            base_delay=2.0,
+            max_delay=15.0,
+            budget=budget,
+            breaker=breaker,
+        )
@@ -0,0 +1,113 @@
+"""
+Record / replay of raw scraper input.
+
+A record run saves every listing page (HTML) and captured API payload (JSON)
+the scrapers parse into a gzip-compressed JSON-lines archive:
+
+    {"platform": "Devpost", "url": "...", "kind": "html", "body": "...", "recorded_at": "..."}
+
+A replay run feeds those bodies through the same parse functions the live
+scrapers use, with no browser and no network, so parsing, normalization and
+upserts can be debugged and benchmarked deterministically on real data.
+"""
+import gzip
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+class SnapshotRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, platform, url, kind, body):
+        entry = {
+            "platform": platform,
+            "url": url,
+            "kind": kind,
+            "body": body,
+            "recorded_at": datetime.utcnow().isoformat(),
+        }
+        with _recorder_lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.count += 1
+
+    def close(self):
+        self._file.close()
+
+
+@contextmanager
+def recording(path):
+    """Record every snapshot taken by the scrapers inside this block to `path`."""
+    global _recorder
+    _recorder = SnapshotRecorder(path)
+    try:
+        yield _recorder
+    finally:
+        _recorder.close()
+        print(f"💾 Recorded {_recorder.count} snapshots to {path}")
+        _recorder = None
+
+
+def record(platform, url, kind, body):
+    """Called by scrapers with the raw input they are about to parse. No-op unless recording."""
+    if _recorder is not None:
+        _recorder.write(platform, url, kind, body)
+
+
+def load_snapshots(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# Live MLH overwrites earlier captures of the same link; the others keep the first
+_LAST_WINS = {"MLH"}
+
+
+def _parsers():
+    from .devpost import parse_devpost_listing
+    from .unstop import parse_unstop_listing
+    from .mlh import MLH_URL, parse_mlh_api_payload, parse_mlh_event_page
+
+    def mlh_html(body, url):
+        # The events listing itself only yields links to the recorded event pages
+        return [] if url == MLH_URL else [parse_mlh_event_page(body, url)]
+
+    return {
+        ("Devpost", "html"): parse_devpost_listing,
+        ("Unstop", "html"): parse_unstop_listing,
+        ("MLH", "json"): lambda body, url: parse_mlh_api_payload(body),
+        ("MLH", "html"): mlh_html,
+    }
+
+
+def replay(path, platforms=None):
+    """
+    Parse a recorded archive exactly like a live run would. Returns the
+    scraped hackathons (deduplicated by link per platform, as live).
+    """
+    parsers = _parsers()
+    hackathons = {}
+    entries = 0
+    for entry in load_snapshots(path):
+        if platforms and entry["platform"] not in platforms:
+            continue
+        parser = parsers.get((entry["platform"], entry["kind"]))
+        if parser is None:
+            continue
+        entries += 1
+        for h in parser(entry["body"], entry["url"]):
+            key = (h["platform"], h["link"])
+            if entry["platform"] in _LAST_WINS or key not in hackathons:
+                hackathons[key] = h
+
+    print(f"⏯️ Replayed {entries} snapshots -> {len(hackathons)} hackathons")
+    return list(hackathons.values())
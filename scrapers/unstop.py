@@ -1,6 +1,11 @@
 from playwright.sync_api import sync_playwright
+from bs4 import BeautifulSoup
 import time
 
+from .resilience import CircuitOpenError, RetryBudget, guarded_goto
+from .snapshots import record
+from app.profiling import span
+
 BASE_URL = "https://unstop.com/hackathons"
 
 FILTER_URLS = [
@@ -9,8 +14,8 @@ FILTER_URLS = [
     "https://unstop.com/hackathons?status=ongoing",
     # Mode filters
     "https://unstop.com/hackathons?mode=online",
-    "https://unstop.com/hackathons?mode=offline"  
-      "https://unstop.com/hackathons?mode=hybrid",
+    "https://unstop.com/hackathons?mode=offline",
+    "https://unstop.com/hackathons?mode=hybrid",
     # Eligibility filters
     "https://unstop.com/hackathons?eligibility=everyone",
     "https://unstop.com/hackathons?eligibility=college",
@@ -53,74 +58,99 @@ FILTER_URLS = [
     "https://unstop.com/hackathons?search=social",
 ]
 
-def fetch_unstop_hackathons():
+def parse_unstop_listing(html, url):
+    """Extract hackathons from a rendered Unstop listing page loaded from `url`."""
+    soup = BeautifulSoup(html, "html.parser")
+    hackathons = []
+
+    for link_el in soup.select("a[href^='/hackathons/']"):
+        link = link_el.get("href")
+        if not link:
+            continue
+        full_link = "https://unstop.com" + link
+        title = link_el.get_text("\n", strip=True)
+
+        # Try to extract image URL from parent card
+        image_url = None
+        card = link_el.parent
+        img_el = card.select_one("img") if card else None
+        if img_el:
+            image_url = img_el.get("src") or img_el.get("data-src") or img_el.get("data-image")
+            if image_url and not image_url.startswith("http"):
+                image_url = "https://unstop.com" + image_url
+
+        hackathons.append({
+            "name": title,
+            "platform": "Unstop",
+            "location": "Online" if "online" in url else "Offline",
+            "link": full_link,
+            "image_url": image_url,
+        })
+    return hackathons
+
+
+def fetch_unstop_hackathons(urls=None):
+    """
+    Scrape `urls` (default: all FILTER_URLS) in one browser session.
+    Returns (hackathons, failed_urls).
+    """
+    urls = urls or FILTER_URLS
     hackathons = {}
+    failed = []
+    budget = RetryBudget()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        with span("browser_launch"):
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
 
-        for url in FILTER_URLS:
+        for i, url in enumerate(urls):
             print(f"\n🔍 Scraping: {url}")
-            page.goto(url, timeout=60000)
-            page.wait_for_timeout(4000)
-
+            try:
+                guarded_goto(page, url, budget=budget, timeout=60000)
+            except CircuitOpenError as e:
+                print(f"⛔ Skipping remaining Unstop URLs: {e}")
+                failed.extend(urls[i:])
+                break
+            except Exception as e:
+                print(f"❌ Failed to load {url}: {e}")
+                failed.append(url)
+                continue
             last_count = 0
             idle_scrolls = 0
 
-            while idle_scrolls < 3:
-                # Scroll to bottom
-                page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
-                time.sleep(2)
-
-                # Grab all hackathon links
-                links = page.locator("a[href^='/hackathons/']")
-                count = links.count()
-
-                if count == last_count:
-                    idle_scrolls += 1
-                else:
-                    idle_scrolls = 0
-
-                last_count = count
-
-                # Extract hackathons
-                for i in range(count):
-                    link = links.nth(i).get_attribute("href")
-                    if not link:
-                        continue
-                    full_link = "https://unstop.com" + link
-                    if full_link in hackathons:
-                        continue
-                    title = links.nth(i).inner_text().strip()
-
-                    # Try to extract image URL from parent card
-                    image_url = None
-                    try:
-                        # Get the parent card element
-                        card = links.nth(i).locator("..")
-                        img_el = card.locator("img")
-                        if img_el.count() > 0:
-                            image_url = img_el.get_attribute("src") or img_el.get("data-src") or img_el.get("data-image")
-                            if image_url and not image_url.startswith("http"):
-                                image_url = "https://unstop.com" + image_url
-                    except Exception:
-                        pass
-
-                    hackathons[full_link] = {
-                        "name": title,
-                        "platform": "Unstop",
-                        "location": "Online" if "online" in url else "Offline",
-                        "link": full_link,
-                        "image_url": image_url,
-                    }
+            with span("scroll_wait"):
+                page.wait_for_timeout(4000)
+
+                while idle_scrolls < 3:
+                    # Scroll to bottom
+                    page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
+                    time.sleep(2)
+
+                    # Grab all hackathon links
+                    links = page.locator("a[href^='/hackathons/']")
+                    count = links.count()
+
+                    if count == last_count:
+                        idle_scrolls += 1
+                    else:
+                        idle_scrolls = 0
+
+                    last_count = count
+
+            # Extract hackathons once the list has stopped growing
+            html = page.content()
+            record("Unstop", url, "html", html)
+            with span("parse"):
+                for h in parse_unstop_listing(html, url):
+                    hackathons.setdefault(h["link"], h)
 
             print(f"📦 Collected so far: {len(hackathons)}")
 
         browser.close()
 
     print(f"\n✅ TOTAL Unstop hackathons scraped: {len(hackathons)}")
-    return list(hackathons.values())
+    return list(hackathons.values()), failed
 
 
 if __name__ == "__main__":